@@ -0,0 +1,313 @@
+"""
+Async load generator and benchmark for the competition API.
+
+Simulates N teams registering, logging in, submitting and verifying, then
+reviewing matches (/matches/next + comparison submit) at a fixed rate per
+team while leaderboard readers poll in the background. Prints p50/p95/p99
+latency and throughput per endpoint.
+
+    python load_test.py --teams 50 --duration 60 --review-rate 0.5
+    python load_test.py --output run.json --baseline last_run.json
+
+Run it against a local server backed by a scratch Postgres database; it
+creates real teams, submissions and comparisons.
+"""
+import argparse
+import asyncio
+import json
+import random
+import secrets
+import sys
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+import httpx
+from faker import Faker
+
+fake = Faker()
+
+BASE_URL = "http://localhost:8000"
+PASSWORD = "password123!"
+
+
+class Recorder:
+    """Latency samples and failures per endpoint, keyed by route template"""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self.status_codes: Dict[str, Dict[int, int]] = defaultdict(lambda: defaultdict(int))
+
+    async def request(
+        self,
+        client: httpx.AsyncClient,
+        endpoint: str,
+        method: str,
+        url: str,
+        ok_statuses=(200, 201),
+        **kwargs
+    ) -> Optional[httpx.Response]:
+        started = time.perf_counter()
+        try:
+            response = await client.request(method, url, **kwargs)
+        except httpx.HTTPError as e:
+            self.errors[endpoint] += 1
+            self.status_codes[endpoint][0] += 1
+            print(f"{endpoint}: {type(e).__name__} {e}", file=sys.stderr)
+            return None
+        self.latencies[endpoint].append(time.perf_counter() - started)
+        self.status_codes[endpoint][response.status_code] += 1
+        if response.status_code not in ok_statuses:
+            self.errors[endpoint] += 1
+        return response
+
+
+def percentile(sorted_values: List[float], p: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, int(round(p / 100 * len(sorted_values))))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def summarize(recorder: Recorder, elapsed: float) -> Dict[str, Dict[str, float]]:
+    summary = {}
+    for endpoint in sorted(set(recorder.latencies) | set(recorder.errors)):
+        values = sorted(recorder.latencies[endpoint])
+        requests_made = sum(recorder.status_codes[endpoint].values())
+        summary[endpoint] = {
+            "requests": requests_made,
+            "errors": recorder.errors[endpoint],
+            "throughput_rps": round(requests_made / elapsed, 2) if elapsed else 0.0,
+            "mean_ms": round(1000 * sum(values) / len(values), 2) if values else 0.0,
+            "p50_ms": round(1000 * percentile(values, 50), 2),
+            "p95_ms": round(1000 * percentile(values, 95), 2),
+            "p99_ms": round(1000 * percentile(values, 99), 2),
+            "max_ms": round(1000 * values[-1], 2) if values else 0.0,
+        }
+    return summary
+
+
+def print_summary(title: str, summary: Dict[str, Dict[str, float]]) -> None:
+    print(f"\n{title}")
+    header = f"{'endpoint':<44}{'reqs':>8}{'errs':>6}{'rps':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}"
+    print(header)
+    print("-" * len(header))
+    for endpoint, s in summary.items():
+        print(
+            f"{endpoint:<44}{s['requests']:>8}{s['errors']:>6}{s['throughput_rps']:>9}"
+            f"{s['p50_ms']:>10}{s['p95_ms']:>10}{s['p99_ms']:>10}{s['max_ms']:>10}"
+        )
+
+
+class Team:
+    def __init__(self, name: str):
+        self.name = name
+        self.token: Optional[str] = None
+        self.submission_ids: List[int] = []
+
+    @property
+    def headers(self) -> Dict[str, str]:
+        return {"Authorization": f"Bearer {self.token}"}
+
+
+async def setup_team(client: httpx.AsyncClient, recorder: Recorder, team: Team, submissions: int) -> bool:
+    """Register, log in, submit and verify the latest submission"""
+    response = await recorder.request(client, "POST /api/teams/register", "POST", "/api/teams/register", json={
+        "team_name": team.name,
+        "team_full_name": f"Load test {team.name}",
+        "password": PASSWORD
+    })
+    if response is None or response.status_code != 201:
+        return False
+
+    response = await recorder.request(client, "POST /api/teams/login", "POST", "/api/teams/login", json={
+        "team_name": team.name,
+        "password": PASSWORD
+    })
+    if response is None or response.status_code != 200:
+        return False
+    team.token = response.json()["access_token"]
+
+    for _ in range(submissions):
+        response = await recorder.request(
+            client, "POST /api/submissions", "POST", "/api/submissions",
+            headers=team.headers,
+            json={
+                "prompt": fake.text(max_nb_chars=200),
+                "response": fake.text(max_nb_chars=500),
+                "table_metadata": {"load_test": True}
+            }
+        )
+        if response is not None and response.status_code == 201:
+            team.submission_ids.append(response.json()["submission_id"])
+
+    if not team.submission_ids:
+        return False
+
+    response = await recorder.request(
+        client, "PUT /api/submissions/{id}/verify", "PUT",
+        f"/api/submissions/{team.submission_ids[-1]}/verify",
+        headers=team.headers,
+        json={"status": "verified"}
+    )
+    return response is not None and response.status_code == 200
+
+
+async def paced(rate: float, deadline: float, action) -> None:
+    """Run action at `rate` per second until the deadline, starting at a random offset"""
+    interval = 1.0 / rate
+    next_start = time.monotonic() + random.uniform(0, interval)
+    while True:
+        delay = next_start - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if time.monotonic() >= deadline:
+            return
+        await action()
+        # Fixed schedule; a slow server lowers throughput instead of piling up requests
+        next_start = max(next_start + interval, time.monotonic())
+
+
+async def review_once(client: httpx.AsyncClient, recorder: Recorder, team: Team) -> None:
+    response = await recorder.request(
+        client, "GET /matches/next", "GET", "/matches/next",
+        headers=team.headers,
+        ok_statuses=(200, 404)
+    )
+    if response is None or response.status_code != 200:
+        return
+    match = response.json()
+    winner, loser = random.sample(
+        [match["submission1"]["submission_id"], match["submission2"]["submission_id"]], 2
+    )
+    await recorder.request(
+        client, "POST /api/comparisons/{id}/submit", "POST",
+        f"/api/comparisons/{match['comparison_id']}/submit",
+        headers=team.headers,
+        json={
+            "winner_submission_id": winner,
+            "loser_submission_id": loser,
+            "score_difference": random.randint(1, 3)
+        }
+    )
+
+
+async def read_leaderboard(client: httpx.AsyncClient, recorder: Recorder) -> None:
+    await recorder.request(client, "GET /api/leaderboard", "GET", "/api/leaderboard")
+
+
+def compare_to_baseline(summary, baseline, max_regression: float) -> List[str]:
+    """Endpoints whose p95 grew by more than max_regression (a fraction) over the baseline"""
+    regressions = []
+    for endpoint, current in summary.items():
+        previous = baseline.get(endpoint)
+        if not previous or not previous["p95_ms"]:
+            continue
+        growth = current["p95_ms"] / previous["p95_ms"] - 1
+        if growth > max_regression:
+            regressions.append(
+                f"{endpoint}: p95 {previous['p95_ms']} ms -> {current['p95_ms']} ms (+{growth:.0%})"
+            )
+    return regressions
+
+
+async def run(args) -> int:
+    run_id = secrets.token_hex(3)
+    teams = [Team(f"lt{run_id}_{i}") for i in range(args.teams)]
+    limits = httpx.Limits(max_connections=args.connections, max_keepalive_connections=args.connections)
+
+    async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=args.timeout) as client:
+        # Setup phase
+        setup_recorder = Recorder()
+        semaphore = asyncio.Semaphore(args.setup_concurrency)
+
+        async def setup(team: Team) -> bool:
+            async with semaphore:
+                return await setup_team(client, setup_recorder, team, args.submissions)
+
+        started = time.perf_counter()
+        ready = await asyncio.gather(*(setup(team) for team in teams))
+        setup_elapsed = time.perf_counter() - started
+        teams = [team for team, ok in zip(teams, ready) if ok]
+        print(f"Run {run_id}: {len(teams)}/{args.teams} teams ready in {setup_elapsed:.1f}s")
+        print_summary("Setup", summarize(setup_recorder, setup_elapsed))
+        if len(teams) < 3:
+            print("Need at least 3 ready teams to review matches", file=sys.stderr)
+            return 1
+
+        if args.generate_matches:
+            # Admin only; any ready team's token is accepted
+            response = await setup_recorder.request(
+                client, "POST /admin/matches/generate", "POST", "/admin/matches/generate",
+                headers=teams[0].headers,
+                json={}
+            )
+            if response is None or response.status_code != 200:
+                status_code = response.status_code if response is not None else "no response"
+                print(f"Match generation failed ({status_code}), not starting the load phase", file=sys.stderr)
+                return 1
+            print(f"Generated matches: {response.json()}")
+
+        # Load phase
+        recorder = Recorder()
+        started = time.perf_counter()
+        deadline = time.monotonic() + args.duration
+        workers = [
+            paced(args.review_rate, deadline, lambda team=team: review_once(client, recorder, team))
+            for team in teams
+        ]
+        workers += [
+            paced(args.leaderboard_rate, deadline, lambda: read_leaderboard(client, recorder))
+            for _ in range(args.leaderboard_readers)
+        ]
+        await asyncio.gather(*workers)
+        elapsed = time.perf_counter() - started
+
+    summary = summarize(recorder, elapsed)
+    total = sum(s["requests"] for s in summary.values())
+    print_summary(f"Load ({elapsed:.1f}s, {total} requests, {total / elapsed:.1f} req/s)", summary)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"run_id": run_id, "args": vars(args), "summary": summary}, f, indent=2)
+        print(f"\nWrote {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)["summary"]
+        regressions = compare_to_baseline(summary, baseline, args.max_regression)
+        if regressions:
+            print("\nRegressions against baseline:")
+            for line in regressions:
+                print(f"  {line}")
+            return 2
+        print("\nNo p95 regressions against baseline")
+
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the competition API")
+    parser.add_argument("--base-url", default=BASE_URL)
+    parser.add_argument("--teams", type=int, default=20, help="Simulated teams, each also a reviewer")
+    parser.add_argument("--submissions", type=int, default=2, help="Submissions per team during setup")
+    parser.add_argument("--duration", type=float, default=30, help="Seconds of review load")
+    parser.add_argument("--review-rate", type=float, default=1.0, help="Reviews per second per team")
+    parser.add_argument("--leaderboard-readers", type=int, default=10)
+    parser.add_argument("--leaderboard-rate", type=float, default=1.0, help="Reads per second per reader")
+    parser.add_argument("--connections", type=int, default=100, help="Max concurrent HTTP connections")
+    parser.add_argument("--setup-concurrency", type=int, default=10)
+    parser.add_argument("--timeout", type=float, default=30)
+    parser.add_argument("--generate-matches", action="store_true", help="Seed every match in the round before the load phase")
+    parser.add_argument("--output", help="Write the summary as JSON")
+    parser.add_argument("--baseline", help="Summary JSON from an earlier run to compare p95 against")
+    parser.add_argument("--max-regression", type=float, default=0.2, help="Allowed p95 growth over the baseline")
+    args = parser.parse_args()
+
+    sys.exit(asyncio.run(run(args)))
+
+
+if __name__ == "__main__":
+    main()
@@ -17,6 +17,7 @@ from backend.models.submission import Submission
 from backend.models.leaderboard import Leaderboard
 from backend.models.comparison import Comparison
 from backend.models.matches import Match
+from backend.models.competition_state import CompetitionState
 
 # this is the Alembic Config object
 config = context.config
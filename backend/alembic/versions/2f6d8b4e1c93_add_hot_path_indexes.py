@@ -0,0 +1,50 @@
+"""add hot path indexes
+
+Revision ID: 2f6d8b4e1c93
+Revises: e7b3f9c1a6d2
+Create Date: 2026-10-17 23:48:19.774052
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2f6d8b4e1c93'
+down_revision: Union[str, None] = 'e7b3f9c1a6d2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Duplicates the primary key index
+    op.drop_index('ix_submissions_submission_id', table_name='submissions')
+    op.create_index(
+        'idx_submissions_round_status_team',
+        'submissions',
+        ['match_round', 'status', 'team_id', 'submitted_at'],
+        unique=False
+    )
+    op.create_index(
+        'idx_matches_round_teams',
+        'matches',
+        ['match_round', 'team1_id', 'team2_id'],
+        unique=False,
+        postgresql_include=['match_id']
+    )
+    op.create_index(
+        'idx_comparisons_unrated',
+        'comparisons',
+        ['completed_at', 'comparison_id'],
+        unique=False,
+        postgresql_where=sa.text("comparison_status = 'completed' AND rated_at IS NULL")
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('idx_comparisons_unrated', table_name='comparisons', postgresql_where=sa.text("comparison_status = 'completed' AND rated_at IS NULL"))
+    op.drop_index('idx_matches_round_teams', table_name='matches', postgresql_include=['match_id'])
+    op.drop_index('idx_submissions_round_status_team', table_name='submissions')
+    op.create_index('ix_submissions_submission_id', 'submissions', ['submission_id'], unique=False)
@@ -0,0 +1,29 @@
+"""add rated_at to comparisons
+
+Revision ID: 3b7d41e9c2a8
+Revises: fc0022addadd
+Create Date: 2026-10-17 09:14:52.318204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3b7d41e9c2a8'
+down_revision: Union[str, None] = 'fc0022addadd'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('comparisons', sa.Column('rated_at', sa.DateTime(), nullable=True))
+    # Comparisons completed before this migration were already applied by the
+    # per-request background task
+    op.execute("UPDATE comparisons SET rated_at = completed_at WHERE comparison_status = 'completed'")
+
+
+def downgrade() -> None:
+    op.drop_column('comparisons', 'rated_at')
@@ -0,0 +1,56 @@
+"""add comparisons reviewer pair unique index
+
+Revision ID: 4c8a2e6f1b95
+Revises: 2f6d8b4e1c93
+Create Date: 2026-10-18 10:21:44.908213
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4c8a2e6f1b95'
+down_revision: Union[str, None] = '2f6d8b4e1c93'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Drop pending duplicates of a pair the reviewer already holds or judged,
+    # keeping completed comparisons and otherwise the oldest. Pending rows
+    # carry no verdict, so this is safe. Two completed verdicts of one pair by
+    # the same reviewer are kept and make the index creation fail; settle
+    # those by hand rather than drop a rated result here.
+    op.execute("""
+        DELETE FROM comparisons c
+        USING comparisons keep
+        WHERE c.comparison_status = 'pending'
+          AND keep.comparison_id != c.comparison_id
+          AND keep.reviewer_id = c.reviewer_id
+          AND keep.match_round = c.match_round
+          AND LEAST(keep.submission_1_id, keep.submission_2_id) = LEAST(c.submission_1_id, c.submission_2_id)
+          AND GREATEST(keep.submission_1_id, keep.submission_2_id) = GREATEST(c.submission_1_id, c.submission_2_id)
+          AND (keep.comparison_status != 'pending' OR keep.comparison_id < c.comparison_id)
+    """)
+    op.create_index(
+        'uq_comparisons_reviewer_pair',
+        'comparisons',
+        [
+            'reviewer_id',
+            'match_round',
+            sa.text('LEAST(submission_1_id, submission_2_id)'),
+            sa.text('GREATEST(submission_1_id, submission_2_id)')
+        ],
+        unique=True,
+        postgresql_where=sa.text('reviewer_id IS NOT NULL')
+    )
+    # Its leading columns serve the same lookups
+    op.drop_index('idx_comparisons_reviewer_round', table_name='comparisons')
+
+
+def downgrade() -> None:
+    op.create_index('idx_comparisons_reviewer_round', 'comparisons', ['reviewer_id', 'match_round'], unique=False)
+    op.drop_index('uq_comparisons_reviewer_pair', table_name='comparisons', postgresql_where=sa.text('reviewer_id IS NOT NULL'))
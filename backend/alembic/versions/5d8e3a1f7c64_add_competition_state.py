@@ -0,0 +1,35 @@
+"""add competition state
+
+Revision ID: 5d8e3a1f7c64
+Revises: c41a9e7b2f05
+Create Date: 2026-10-17 21:40:12.318442
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5d8e3a1f7c64'
+down_revision: Union[str, None] = 'c41a9e7b2f05'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('competition_state',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('current_round', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), server_default=sa.text('now()'), nullable=True),
+    sa.CheckConstraint('id = 1', name='single_row'),
+    sa.CheckConstraint('current_round >= 1', name='valid_current_round'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    # Round 1 was the in-memory default before the round was persisted
+    op.execute("INSERT INTO competition_state (id, current_round) VALUES (1, 1)")
+
+
+def downgrade() -> None:
+    op.drop_table('competition_state')
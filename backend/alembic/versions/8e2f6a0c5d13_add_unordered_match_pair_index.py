@@ -0,0 +1,41 @@
+"""add unordered match pair unique index
+
+Revision ID: 8e2f6a0c5d13
+Revises: 3b7d41e9c2a8
+Create Date: 2026-10-17 11:02:37.645910
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8e2f6a0c5d13'
+down_revision: Union[str, None] = '3b7d41e9c2a8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Drop duplicates left by concurrent generation, keeping the oldest match.
+    # Nothing references matches, so this is safe.
+    op.execute("""
+        DELETE FROM matches m
+        USING matches keep
+        WHERE keep.match_round = m.match_round
+          AND LEAST(keep.team1_id, keep.team2_id) = LEAST(m.team1_id, m.team2_id)
+          AND GREATEST(keep.team1_id, keep.team2_id) = GREATEST(m.team1_id, m.team2_id)
+          AND keep.match_id < m.match_id
+    """)
+    op.create_index(
+        'uq_match_pair_round',
+        'matches',
+        [sa.text('LEAST(team1_id, team2_id)'), sa.text('GREATEST(team1_id, team2_id)'), 'match_round'],
+        unique=True
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('uq_match_pair_round', table_name='matches')
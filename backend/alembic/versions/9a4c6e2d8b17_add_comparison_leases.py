@@ -0,0 +1,47 @@
+"""add comparison leases
+
+Revision ID: 9a4c6e2d8b17
+Revises: 5d8e3a1f7c64
+Create Date: 2026-10-17 22:31:47.502913
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9a4c6e2d8b17'
+down_revision: Union[str, None] = '5d8e3a1f7c64'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('comparisons', sa.Column('lease_expires_at', sa.DateTime(), nullable=True))
+    # Existing pending rows get the default 30 minute lease from creation
+    op.execute(
+        "UPDATE comparisons SET lease_expires_at = created_at + interval '30 minutes' "
+        "WHERE comparison_status = 'pending'"
+    )
+    op.create_index(
+        'idx_comparisons_pending_reviewer',
+        'comparisons',
+        ['reviewer_id', 'lease_expires_at'],
+        unique=False,
+        postgresql_where=sa.text("comparison_status = 'pending'")
+    )
+    op.create_index(
+        'idx_comparisons_pending_lease',
+        'comparisons',
+        ['lease_expires_at'],
+        unique=False,
+        postgresql_where=sa.text("comparison_status = 'pending'")
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('idx_comparisons_pending_lease', table_name='comparisons', postgresql_where=sa.text("comparison_status = 'pending'"))
+    op.drop_index('idx_comparisons_pending_reviewer', table_name='comparisons', postgresql_where=sa.text("comparison_status = 'pending'"))
+    op.drop_column('comparisons', 'lease_expires_at')
@@ -0,0 +1,33 @@
+"""add submission listing indexes
+
+Revision ID: c41a9e7b2f05
+Revises: 8e2f6a0c5d13
+Create Date: 2026-10-17 13:26:08.904117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c41a9e7b2f05'
+down_revision: Union[str, None] = '8e2f6a0c5d13'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('idx_submissions_submitted_at_id', 'submissions', ['submitted_at', 'submission_id'], unique=False)
+    op.create_index(
+        'idx_submissions_round_status_submitted_at',
+        'submissions',
+        ['match_round', 'status', 'submitted_at', 'submission_id'],
+        unique=False
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('idx_submissions_round_status_submitted_at', table_name='submissions')
+    op.drop_index('idx_submissions_submitted_at_id', table_name='submissions')
@@ -0,0 +1,26 @@
+"""add comparisons reviewer round index
+
+Revision ID: e7b3f9c1a6d2
+Revises: 9a4c6e2d8b17
+Create Date: 2026-10-17 23:12:05.318260
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e7b3f9c1a6d2'
+down_revision: Union[str, None] = '9a4c6e2d8b17'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('idx_comparisons_reviewer_round', 'comparisons', ['reviewer_id', 'match_round'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('idx_comparisons_reviewer_round', table_name='comparisons')
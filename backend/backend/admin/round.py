@@ -0,0 +1,104 @@
+import logging
+import os
+import time
+from typing import Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from ..events.broker import event_broker, round_event
+from ..events.listener import pg_listener
+from ..models.competition_state import CompetitionState
+
+logger = logging.getLogger(__name__)
+
+# Used until an admin sets a round
+DEFAULT_ROUND = 1
+# How long a cached round is trusted when no change notifications are arriving
+ROUND_CACHE_TTL_SECONDS = float(os.getenv("ROUND_CACHE_TTL_SECONDS", "5"))
+# Upper bound while listening, in case a notification is lost anyway
+ROUND_CACHE_MAX_AGE_SECONDS = float(os.getenv("ROUND_CACHE_MAX_AGE_SECONDS", "60"))
+ROUND_CHANNEL = "current_round"
+
+
+def load_current_round(db: Session) -> int:
+    """Read the persisted round directly; for background jobs on the sync engine"""
+    value = db.scalar(select(CompetitionState.current_round).where(CompetitionState.id == 1))
+    return value if value is not None else DEFAULT_ROUND
+
+
+class RoundCache:
+    """
+    Per-process copy of the persisted current round.
+
+    While a LISTEN connection is up, changes made by any worker process
+    arrive as notifications and the cached value is trusted for up to
+    ROUND_CACHE_MAX_AGE_SECONDS. Otherwise it is re-read after
+    ROUND_CACHE_TTL_SECONDS.
+    """
+
+    def __init__(self, ttl_seconds: float = ROUND_CACHE_TTL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self._value: Optional[int] = None
+        self._loaded_at = 0.0
+        self._subscribed = False
+
+    async def get(self, db: AsyncSession) -> int:
+        """Return the current round, reading it from the database if the cached value is stale"""
+        if self._value is not None:
+            ttl = ROUND_CACHE_MAX_AGE_SECONDS if self._listening else self.ttl_seconds
+            if time.monotonic() - self._loaded_at < ttl:
+                return self._value
+
+        value = await db.scalar(
+            select(CompetitionState.current_round).where(CompetitionState.id == 1)
+        )
+        self._store(value if value is not None else DEFAULT_ROUND)
+        return self._value
+
+    async def set(self, db: AsyncSession, round_number: int) -> int:
+        """Persist a new round and notify every worker process in the same transaction"""
+        await db.execute(
+            insert(CompetitionState)
+            .values(id=1, current_round=round_number)
+            .on_conflict_do_update(
+                index_elements=[CompetitionState.id],
+                set_={"current_round": round_number, "updated_at": func.now()}
+            )
+        )
+        await db.execute(select(func.pg_notify(ROUND_CHANNEL, str(round_number))))
+        await db.commit()
+        self._store(round_number)
+        return round_number
+
+    def _store(self, value: int) -> None:
+        changed = self._value is not None and self._value != value
+        self._value = value
+        self._loaded_at = time.monotonic()
+        if changed:
+            event_broker.publish(round_event(value))
+
+    def _on_notify(self, connection, pid, channel, payload) -> None:
+        try:
+            self._store(int(payload))
+        except ValueError:
+            logger.error(f"Ignoring malformed {ROUND_CHANNEL} notification: {payload!r}")
+
+    async def _reload(self, connection) -> None:
+        """Pick up any change made while we weren't listening"""
+        value = await connection.fetchval("SELECT current_round FROM competition_state WHERE id = 1")
+        self._store(value if value is not None else DEFAULT_ROUND)
+
+    def start(self) -> None:
+        """Follow changes from other processes; call before pg_listener.start()"""
+        pg_listener.subscribe(ROUND_CHANNEL, self._on_notify, self._reload)
+        self._subscribed = True
+
+    @property
+    def _listening(self) -> bool:
+        return self._subscribed and pg_listener.listening
+
+
+round_cache = RoundCache()
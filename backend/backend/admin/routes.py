@@ -1,35 +1,167 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List, Dict
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Dict, Any, Literal, Optional
+from dataclasses import asdict
 from .. import models
-from .schemas import RoundUpdate
-from ..database import get_db
+from .schemas import RoundUpdate, MatchGenerationRequest, RatingReplayRequest
+from ..database import get_async_db, SessionLocal, pool_status
+from ..leaderboard.cache import leaderboard_cache
+from ..events.broker import event_broker, leaderboard_event
+from ..matches.rating_worker import leaderboard_notify
+from ..utils.elo_replay import replay_leaderboard
+from ..utils.match_generation import generate_round_matches
+from ..utils.export import stream_export, MEDIA_TYPES
+from .round import round_cache
+from ..auth import require_admin
 # from ..utils.auth import get_current_admin_user
 
-# Global variable for current round
-CURRENT_ROUND = 1
-
 router = APIRouter(prefix="/admin")
 
 @router.get("/round", response_model=Dict[str, int])
 async def get_current_round(
+    db: AsyncSession = Depends(get_async_db),
     # current_admin: models.Team = Depends(get_current_admin_user)
 ):
     """Get current match round"""
-    return {"current_round": CURRENT_ROUND}
+    return {"current_round": await round_cache.get(db)}
 
 @router.put("/round", response_model=Dict[str, int])
 async def update_round(
     round_data: RoundUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     # current_admin: models.Team = Depends(get_current_admin_user)
 ):
     """Update current match round"""
-    global CURRENT_ROUND
     if round_data.round_number < 1:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Round number cannot be less than 1"
         )
-    CURRENT_ROUND = round_data.round_number
-    return {"current_round": CURRENT_ROUND} 
\ No newline at end of file
+    try:
+        # Persisted, and broadcast to every worker process
+        current_round = await round_cache.set(db, round_data.round_number)
+    except Exception as e:
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=str(e)
+        )
+    return {"current_round": current_round}
+
+@router.post("/matches/generate", response_model=Dict[str, int])
+async def generate_matches(
+    request: MatchGenerationRequest,
+    db: AsyncSession = Depends(get_async_db),
+    _: bool = Depends(require_admin)
+):
+    """Create every missing match between teams with verified submissions in a round"""
+    match_round = request.match_round if request.match_round is not None else await round_cache.get(db)
+    try:
+        # Runs the set-based generator on this session's connection
+        matches_created = await db.run_sync(generate_round_matches, match_round)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=str(e)
+        )
+    return {"match_round": match_round, "matches_created": matches_created}
+
+def _run_replay(replay: RatingReplayRequest):
+    db = SessionLocal()
+    try:
+        return replay_leaderboard(
+            db,
+            k_factor=replay.k_factor,
+            initial_rating=replay.initial_rating,
+            dry_run=replay.dry_run
+        )
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+@router.post("/ratings/replay", response_model=Dict[str, Any])
+async def replay_ratings(
+    replay: RatingReplayRequest,
+    db: AsyncSession = Depends(get_async_db),
+    _: bool = Depends(require_admin)
+):
+    """Recompute every team's Elo from the full comparison history"""
+    try:
+        result = await run_in_threadpool(_run_replay, replay)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=str(e)
+        )
+
+    if not replay.dry_run:
+        leaderboard_cache.invalidate()
+        # Every score may have changed; push the whole board rather than a diff,
+        # and have the other worker processes do the same
+        event_broker.publish(leaderboard_event(await leaderboard_cache.get(db)))
+        await db.execute(leaderboard_notify({"reset": True}))
+        await db.commit()
+    return asdict(result)
+
+@router.get("/db/pool", response_model=Dict[str, Any])
+async def get_pool_status(
+    _: bool = Depends(require_admin)
+):
+    """Connection pool usage plus checkout latency, wait, timeout and overflow counts"""
+    return pool_status()
+
+def _export_response(query, name: str, fmt: str, compress: bool) -> StreamingResponse:
+    filename = f"{name}.{fmt}" + (".gz" if compress else "")
+    return StreamingResponse(
+        stream_export(query, fmt, compress),
+        media_type="application/gzip" if compress else MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+@router.get("/export/submissions")
+async def export_submissions(
+    format: Literal['ndjson', 'csv'] = 'ndjson',
+    gzip: bool = False,
+    match_round: Optional[int] = Query(None, ge=0),
+    include_text: bool = False,
+    _: bool = Depends(require_admin)
+):
+    """Stream every submission as NDJSON or CSV; prompt, response and metadata only with include_text"""
+    columns = [
+        models.Submission.submission_id,
+        models.Submission.team_id,
+        models.Submission.match_round,
+        models.Submission.status,
+        models.Submission.submitted_at,
+    ]
+    if include_text:
+        columns += [
+            models.Submission.prompt,
+            models.Submission.response,
+            models.Submission.table_metadata,
+        ]
+
+    query = select(*columns).order_by(models.Submission.submission_id)
+    if match_round is not None:
+        query = query.where(models.Submission.match_round == match_round)
+
+    return _export_response(query, "submissions", format, gzip)
+
+@router.get("/export/comparisons")
+async def export_comparisons(
+    format: Literal['ndjson', 'csv'] = 'ndjson',
+    gzip: bool = False,
+    match_round: Optional[int] = Query(None, ge=0),
+    _: bool = Depends(require_admin)
+):
+    """Stream every comparison as NDJSON or CSV"""
+    query = select(*models.Comparison.__table__.columns).order_by(models.Comparison.comparison_id)
+    if match_round is not None:
+        query = query.where(models.Comparison.match_round == match_round)
+
+    return _export_response(query, "comparisons", format, gzip)
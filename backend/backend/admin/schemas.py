@@ -1,4 +1,12 @@
 from pydantic import BaseModel, Field
 
 class RoundUpdate(BaseModel):
-    round_number: int = Field(..., ge=1, description="New round number")
\ No newline at end of file
+    round_number: int = Field(..., ge=1, description="New round number")
+
+class MatchGenerationRequest(BaseModel):
+    match_round: int | None = Field(None, ge=0, description="Round to seed; defaults to the current round")
+
+class RatingReplayRequest(BaseModel):
+    k_factor: float = Field(32, gt=0, description="Elo K-factor to replay with")
+    initial_rating: int = Field(1200, ge=0, description="Rating every team starts from")
+    dry_run: bool = Field(False, description="Compute without writing the leaderboard")
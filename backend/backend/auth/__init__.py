@@ -1,4 +1,7 @@
 # Leave this empty
 
-from .utils import verify_password, get_password_hash, create_access_token, generate_team_id
+from .utils import (
+    verify_password, get_password_hash, verify_password_async, get_password_hash_async,
+    create_access_token, generate_team_id
+)
 from .dependencies import get_current_team, get_current_team_id, require_admin
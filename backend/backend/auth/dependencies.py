@@ -1,46 +1,111 @@
+from collections import OrderedDict
+from typing import Optional, Tuple
+import os
+import time
+
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from backend.database import get_db
+from backend.database import get_async_db
 from backend.models.team import Team
 from backend.auth.utils import SECRET_KEY, ALGORITHM
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/teams/login")
 
-async def get_current_team(
-    token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db)
-):
-    credentials_exception = HTTPException(
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", "4096"))
+TOKEN_CACHE_TTL_SECONDS = float(os.getenv("TOKEN_CACHE_TTL_SECONDS", "300"))
+
+class TokenCache:
+    """
+    LRU cache of verified tokens to the team_id in their signed `sub` claim.
+    Entries never outlive the token's own `exp`.
+    """
+
+    def __init__(self, max_size: int = TOKEN_CACHE_SIZE, ttl_seconds: float = TOKEN_CACHE_TTL_SECONDS):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, token: str) -> Optional[str]:
+        entry = self._entries.get(token)
+        if entry is None:
+            self.misses += 1
+            return None
+        team_id, expires_at = entry
+        if time.monotonic() >= expires_at:
+            del self._entries[token]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(token)
+        self.hits += 1
+        return team_id
+
+    def put(self, token: str, team_id: str, exp: Optional[float]) -> None:
+        ttl = self.ttl_seconds
+        if exp is not None:
+            ttl = min(ttl, exp - time.time())
+        if ttl <= 0:
+            return
+        self._entries[token] = (team_id, time.monotonic() + ttl)
+        self._entries.move_to_end(token)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+token_cache = TokenCache()
+
+def _credentials_exception() -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    
+
+def decode_team_id(token: str) -> str:
+    """Verify the token (or find it in the cache) and return its team_id"""
+    team_id = token_cache.get(token)
+    if team_id is not None:
+        return team_id
+
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         team_id: str = payload.get("sub")
         if team_id is None:
-            raise credentials_exception
+            raise _credentials_exception()
     except JWTError:
-        raise credentials_exception
-        
-    team = db.query(Team).filter(Team.team_id == team_id).first()
+        raise _credentials_exception()
+
+    token_cache.put(token, team_id, payload.get("exp"))
+    return team_id
+
+async def get_current_team(
+    token: str = Depends(oauth2_scheme),
+    db: AsyncSession = Depends(get_async_db)
+):
+    team_id = decode_team_id(token)
+
+    team = await db.scalar(select(Team).where(Team.team_id == team_id))
     if team is None:
-        raise credentials_exception
-        
+        raise _credentials_exception()
+
     return team
 
 async def get_current_team_id(
-    team: Team = Depends(get_current_team)
+    token: str = Depends(oauth2_scheme)
 ) -> str:
-    return team.team_id
+    # Trusts the signed `sub` claim; no database round-trip
+    return decode_team_id(token)
 
 async def require_admin(
-    team: Team = Depends(get_current_team)
+    team_id: str = Depends(get_current_team_id)
 ) -> bool:
     # TODO: Implement proper admin check
     # For now, just return True if authenticated
-    return True 
\ No newline at end of file
+    return True
@@ -1,22 +1,34 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Any, Dict, List
 from datetime import timedelta
 
 from backend.models.team import Team
-from backend.database import get_db
+from backend.database import get_async_db
 from backend.auth.schemas import TeamCreate, TeamLogin, TeamResponse, Token
+from backend.auth.dependencies import require_admin
 from backend.auth.utils import (
-    verify_password, get_password_hash, create_access_token,
-    generate_team_id, ACCESS_TOKEN_EXPIRE_MINUTES
+    verify_password_async, get_password_hash_async, create_access_token,
+    generate_team_id, password_hash_pool, PasswordHashPoolFull,
+    ACCESS_TOKEN_EXPIRE_MINUTES
 )
+from backend.leaderboard.cache import leaderboard_cache
+from backend.utils.leaderboard_sync import add_teams_to_leaderboard
 
 router = APIRouter(prefix="/api")
 
+def _busy_exception() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Too many login attempts in progress, please retry shortly",
+        headers={"Retry-After": "1"},
+    )
+
 @router.post("/teams/register", response_model=TeamResponse, status_code=status.HTTP_201_CREATED)
-async def register_team(team_data: TeamCreate, db: Session = Depends(get_db)):
+async def register_team(team_data: TeamCreate, db: AsyncSession = Depends(get_async_db)):
     # Check if team name already exists
-    existing_team = db.query(Team).filter(Team.team_name == team_data.team_name).first()
+    existing_team = await db.scalar(select(Team).where(Team.team_name == team_data.team_name))
     if existing_team:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -25,7 +37,10 @@ async def register_team(team_data: TeamCreate, db: Session = Depends(get_db)):
     
     # Create new team
     team_id = generate_team_id()
-    hashed_password = get_password_hash(team_data.password)
+    try:
+        hashed_password = await get_password_hash_async(team_data.password)
+    except PasswordHashPoolFull:
+        raise _busy_exception()
     
     new_team = Team(
         team_id=team_id,
@@ -36,14 +51,17 @@ async def register_team(team_data: TeamCreate, db: Session = Depends(get_db)):
     
     try:
         db.add(new_team)
-        db.commit()
-        db.refresh(new_team)
+        await db.flush()
+        # Same transaction, so the team is never missing from the leaderboard
+        await add_teams_to_leaderboard(db, [team_id])
+        await db.commit()
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Error creating team"
         )
+    leaderboard_cache.invalidate()
     
     return TeamResponse(
         team_id=new_team.team_id,
@@ -52,10 +70,17 @@ async def register_team(team_data: TeamCreate, db: Session = Depends(get_db)):
     )
 
 @router.post("/teams/login", response_model=Token)
-async def login_team(team_credentials: TeamLogin, db: Session = Depends(get_db)):
+async def login_team(team_credentials: TeamLogin, db: AsyncSession = Depends(get_async_db)):
     # Find team by name
-    team = db.query(Team).filter(Team.team_name == team_credentials.team_name).first()
-    if not team or not verify_password(team_credentials.password, team.team_password):
+    team = await db.scalar(select(Team).where(Team.team_name == team_credentials.team_name))
+    try:
+        password_ok = bool(team) and await verify_password_async(
+            team_credentials.password, team.team_password
+        )
+    except PasswordHashPoolFull:
+        raise _busy_exception()
+    
+    if not password_ok:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect team name or password",
@@ -77,12 +102,17 @@ async def login_team(team_credentials: TeamLogin, db: Session = Depends(get_db))
 
 # TODO: add admin authentication 
 @router.get("/admin/teams", response_model=List[TeamResponse])
-async def get_all_teams(db: Session = Depends(get_db)):
-    teams = db.query(Team).all()
+async def get_all_teams(db: AsyncSession = Depends(get_async_db)):
+    teams = (await db.scalars(select(Team))).all()
     return [
         TeamResponse(
             team_id=team.team_id,
             team_name=team.team_name,
             team_full_name=team.team_full_name
         ) for team in teams
-    ] 
\ No newline at end of file
+    ]
+
+@router.get("/admin/auth/hash-pool", response_model=Dict[str, Any])
+async def get_hash_pool_stats(_: bool = Depends(require_admin)):
+    """Concurrency and queue depth of the password hashing pool"""
+    return password_hash_pool.stats()
@@ -0,0 +1,73 @@
+import argparse
+import logging
+import os
+
+from sqlalchemy import func, select
+from sqlalchemy.engine import Engine
+
+from backend.database import engine as default_engine, SessionLocal
+from backend.models.base import Base
+from backend.utils.leaderboard_sync import sync_teams_to_leaderboard
+
+logger = logging.getLogger(__name__)
+
+# Run the bootstrap from each worker's startup. With many workers, prefer
+# turning this off and running `python -m backend.bootstrap` once per deploy.
+BOOTSTRAP_ON_STARTUP = os.getenv("BOOTSTRAP_ON_STARTUP", "true").lower() in ("1", "true", "yes")
+
+# Session-level advisory lock; one process bootstraps and the others skip,
+# after waiting for it to finish unless wait=False
+BOOTSTRAP_LOCK_KEY = 0x424F4F54  # "BOOT"
+
+
+def bootstrap_database(engine: Engine = default_engine, wait: bool = False) -> bool:
+    """
+    Create missing tables and add missing teams to the leaderboard.
+
+    Only the process that takes the lock does the work. If another process
+    holds it, returns False without doing anything; with wait set, only once
+    that process has finished, so the schema exists on return.
+    """
+    with engine.connect() as conn:
+        acquired = conn.scalar(select(func.pg_try_advisory_lock(BOOTSTRAP_LOCK_KEY)))
+        conn.commit()
+        if not acquired:
+            if wait:
+                # Held until the leader is done; nothing left to do after it
+                conn.scalar(select(func.pg_advisory_lock(BOOTSTRAP_LOCK_KEY)))
+                conn.scalar(select(func.pg_advisory_unlock(BOOTSTRAP_LOCK_KEY)))
+                conn.commit()
+                logger.info("Bootstrap completed by another process")
+            else:
+                logger.info("Bootstrap already running in another process, skipping")
+            return False
+
+        try:
+            Base.metadata.create_all(bind=conn)
+            conn.commit()
+
+            db = SessionLocal()
+            try:
+                sync_teams_to_leaderboard(db)
+            finally:
+                db.close()
+        finally:
+            conn.scalar(select(func.pg_advisory_unlock(BOOTSTRAP_LOCK_KEY)))
+            conn.commit()
+
+    logger.info("Database bootstrap completed")
+    return True
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    parser = argparse.ArgumentParser(description="Create missing tables and sync teams to the leaderboard")
+    parser.add_argument("--no-wait", action="store_true", help="Return at once instead of waiting if another process is bootstrapping")
+    args = parser.parse_args()
+
+    bootstrap_database(wait=not args.no_wait)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,33 @@
 from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy.ext.declarative import declarative_base
-from typing import Generator
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+from typing import Any, AsyncGenerator, Dict, Generator
 import os
 from dotenv import load_dotenv
 
+from backend.models.base import Base
+from backend.utils.db_pool import InstrumentedAsyncQueuePool, InstrumentedQueuePool
+from backend.utils.metrics import instrument_engine
+
 # Load environment variables
 load_dotenv()
 
+# Connection pool settings. Each worker process holds up to
+# (DB_POOL_SIZE + DB_MAX_OVERFLOW) request connections plus
+# (DB_SYNC_POOL_SIZE + DB_SYNC_MAX_OVERFLOW) background ones, and one
+# LISTEN connection for round and rating changes; size workers so that total stays
+# under the RDS max_connections.
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_SYNC_POOL_SIZE = int(os.getenv("DB_SYNC_POOL_SIZE", "3"))
+DB_SYNC_MAX_OVERFLOW = int(os.getenv("DB_SYNC_MAX_OVERFLOW", "2"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+# 0 keeps the server default
+DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "0"))
+
 # Construct database URL from environment variables
 def get_database_url():
     db_user = os.getenv("DB_USER")
@@ -15,21 +35,78 @@ def get_database_url():
     db_host = os.getenv("DB_HOST")
     db_port = os.getenv("DB_PORT")
     db_name = os.getenv("DB_NAME")
-    
+
     if not all([db_user, db_password, db_host, db_port, db_name]):
         raise ValueError("Missing database configuration. Please check your .env file.")
-        
+
     return f"postgresql://{db_user}:{db_password}@{db_host}:{db_port}/{db_name}"
 
+def get_async_database_url():
+    return get_database_url().replace("postgresql://", "postgresql+asyncpg://", 1)
+
+def create_db_engine(use_async: bool = False):
+    """
+    The one place engines are built, so every pool gets the same settings
+    and telemetry. use_async selects the asyncpg engine for request handlers.
+    """
+    options: Dict[str, Any] = {
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+    }
+
+    if use_async:
+        if DB_STATEMENT_TIMEOUT_MS:
+            options["connect_args"] = {"server_settings": {"statement_timeout": str(DB_STATEMENT_TIMEOUT_MS)}}
+        async_db_engine = create_async_engine(
+            get_async_database_url(),
+            poolclass=InstrumentedAsyncQueuePool,
+            pool_size=DB_POOL_SIZE,
+            max_overflow=DB_MAX_OVERFLOW,
+            **options
+        )
+        # Cursor events fire on the sync engine the async one wraps
+        instrument_engine(async_db_engine.sync_engine)
+        return async_db_engine
+
+    if DB_STATEMENT_TIMEOUT_MS:
+        options["connect_args"] = {"options": f"-c statement_timeout={DB_STATEMENT_TIMEOUT_MS}"}
+    db_engine = create_engine(
+        get_database_url(),
+        poolclass=InstrumentedQueuePool,
+        pool_size=DB_SYNC_POOL_SIZE,
+        max_overflow=DB_SYNC_MAX_OVERFLOW,
+        **options
+    )
+    instrument_engine(db_engine)
+    return db_engine
+
+def pool_status() -> Dict[str, Dict[str, Any]]:
+    """Current usage and checkout telemetry of both connection pools"""
+    return {
+        "async": async_engine.pool.pool_status(),
+        "sync": engine.pool.pool_status(),
+    }
+
 # Create SQLAlchemy engine
 DATABASE_URL = get_database_url()
-engine = create_engine(DATABASE_URL)
+engine: Engine = create_db_engine()
 
 # Create SessionLocal class
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
-# Create Base class
-Base = declarative_base()
+# Async engine used by the request handlers, so database round-trips don't
+# block the event loop. The sync engine above serves background workers,
+# scripts and startup tasks.
+async_engine: AsyncEngine = create_db_engine(use_async=True)
+
+# Attributes stay loaded after commit; lazy refreshes aren't possible with
+# an AsyncSession outside of an await
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    autoflush=False,
+    expire_on_commit=False
+)
 
 def get_db() -> Generator:
     """
@@ -39,4 +116,11 @@ def get_db() -> Generator:
     try:
         yield db
     finally:
-        db.close() 
\ No newline at end of file
+        db.close()
+
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    """
+    Dependency function that yields async database sessions
+    """
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -0,0 +1,121 @@
+import asyncio
+import json
+import logging
+import os
+from typing import Any, AsyncIterator, Iterable, List, Optional, Set
+
+from ..leaderboard.cache import LeaderboardSnapshot
+
+logger = logging.getLogger(__name__)
+
+# Messages buffered per subscriber before it is considered too slow and
+# disconnected; EventSource reconnects and starts again from a full snapshot
+EVENT_QUEUE_SIZE = int(os.getenv("EVENT_QUEUE_SIZE", "64"))
+# Comment lines sent on idle streams so proxies don't close them
+EVENT_KEEPALIVE_SECONDS = float(os.getenv("EVENT_KEEPALIVE_SECONDS", "15"))
+# Client reconnect delay, sent once at the start of every stream
+EVENT_RETRY_MS = int(os.getenv("EVENT_RETRY_MS", "3000"))
+
+KEEPALIVE = b": keepalive\n\n"
+
+
+def format_event(event: str, data: Any) -> bytes:
+    """Encode one Server-Sent Event. Bytes are assumed to be serialized JSON already."""
+    if not isinstance(data, bytes):
+        data = json.dumps(data, separators=(",", ":")).encode()
+    return b"event: " + event.encode() + b"\ndata: " + data + b"\n\n"
+
+
+def leaderboard_event(snapshot: LeaderboardSnapshot) -> bytes:
+    """Full leaderboard, reusing the snapshot's pre-serialized body"""
+    return format_event(
+        "leaderboard",
+        b'{"version":' + str(snapshot.version).encode() + b',"entries":' + snapshot.body + b"}"
+    )
+
+
+def leaderboard_diff_event(version: Optional[int], updates: Iterable[dict]) -> bytes:
+    """Teams whose score or record changed; clients merge by team_id and re-rank"""
+    return format_event("leaderboard_diff", {"version": version, "teams": list(updates)})
+
+
+def round_event(current_round: int) -> bytes:
+    return format_event("round", {"current_round": current_round})
+
+
+class EventBroker:
+    """
+    Fan-out of pre-encoded events to every open event stream in this process.
+
+    Each message is serialized once by the publisher and the same bytes are
+    queued for every subscriber, so an idle subscriber costs one queue and
+    one parked coroutine.
+    """
+
+    def __init__(self, queue_size: int = EVENT_QUEUE_SIZE):
+        self.queue_size = queue_size
+        self._subscribers: Set[asyncio.Queue] = set()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.published = 0
+        self.disconnected_slow = 0
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def publish(self, message: bytes) -> None:
+        """Queue a message for every subscriber. Safe to call from worker threads."""
+        loop = self._loop
+        if loop is None or not self._subscribers:
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            self._deliver(message)
+        else:
+            loop.call_soon_threadsafe(self._deliver, message)
+
+    def _deliver(self, message: bytes) -> None:
+        self.published += 1
+        for queue in list(self._subscribers):
+            try:
+                queue.put_nowait(message)
+            except asyncio.QueueFull:
+                # Too far behind to catch up with diffs; end its stream
+                self._subscribers.discard(queue)
+                self.disconnected_slow += 1
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(None)
+
+    async def stream(self, initial: List[bytes]) -> AsyncIterator[bytes]:
+        """
+        Yield the initial messages, then everything published until the
+        client disconnects or falls behind.
+        """
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        self._loop = asyncio.get_running_loop()
+        # Subscribe before sending the initial state so nothing published
+        # in between is missed
+        self._subscribers.add(queue)
+        try:
+            yield f"retry: {EVENT_RETRY_MS}\n\n".encode()
+            for message in initial:
+                yield message
+            while True:
+                try:
+                    message = await asyncio.wait_for(queue.get(), EVENT_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield KEEPALIVE
+                    continue
+                if message is None:
+                    logger.info("Closed event stream of a subscriber that fell behind")
+                    return
+                yield message
+        finally:
+            self._subscribers.discard(queue)
+
+
+event_broker = EventBroker()
@@ -0,0 +1,100 @@
+import asyncio
+import logging
+import os
+from typing import Awaitable, Callable, Dict, Optional
+
+import asyncpg
+
+from ..database import get_database_url
+
+logger = logging.getLogger(__name__)
+
+LISTEN_ENABLED = os.getenv("LISTEN_ENABLED", "true").lower() in ("1", "true", "yes")
+LISTEN_RETRY_SECONDS = float(os.getenv("LISTEN_RETRY_SECONDS", "5"))
+# An idle connection dropped by a NAT or proxy never reports termination;
+# a periodic query notices it and triggers a reconnect
+LISTEN_PING_SECONDS = float(os.getenv("LISTEN_PING_SECONDS", "30"))
+LISTEN_PING_TIMEOUT_SECONDS = 10.0
+
+# (connection, pid, channel, payload) -> None, called on the event loop
+NotifyCallback = Callable[[asyncpg.Connection, int, str, str], None]
+# Called with the connection after every (re)connect, to catch up on
+# anything published while nobody was listening
+ConnectCallback = Callable[[asyncpg.Connection], Awaitable[None]]
+
+
+class PgListener:
+    """
+    One LISTEN connection per worker process, shared by every channel.
+
+    Lets state changed by one process (the current round, rating updates)
+    reach the caches and event streams of all the others. Subscribe before
+    start(); the connection is reopened after failures.
+    """
+
+    def __init__(self, retry_seconds: float = LISTEN_RETRY_SECONDS):
+        self.retry_seconds = retry_seconds
+        self._channels: Dict[str, NotifyCallback] = {}
+        self._on_connect: Dict[str, ConnectCallback] = {}
+        self._task: Optional[asyncio.Task] = None
+        self.listening = False
+
+    def subscribe(self, channel: str, callback: NotifyCallback, on_connect: Optional[ConnectCallback] = None) -> None:
+        self._channels[channel] = callback
+        if on_connect is not None:
+            self._on_connect[channel] = on_connect
+
+    async def start(self) -> None:
+        if LISTEN_ENABLED and self._channels and self._task is None:
+            self._task = asyncio.create_task(self._listen())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _listen(self) -> None:
+        """Hold the LISTEN connection, reconnecting after failures"""
+        channels = ", ".join(self._channels)
+        while True:
+            try:
+                connection = await asyncpg.connect(get_database_url())
+            except Exception as e:
+                logger.warning(f"Could not open listener for {channels}: {str(e)}")
+                await asyncio.sleep(self.retry_seconds)
+                continue
+
+            closed = asyncio.Event()
+            connection.add_termination_listener(lambda _: closed.set())
+            try:
+                for channel, callback in self._channels.items():
+                    await connection.add_listener(channel, callback)
+                for on_connect in self._on_connect.values():
+                    await on_connect(connection)
+                self.listening = True
+                logger.info(f"Listening for {channels} notifications")
+                while not closed.is_set():
+                    try:
+                        await asyncio.wait_for(closed.wait(), LISTEN_PING_SECONDS)
+                    except asyncio.TimeoutError:
+                        await asyncio.wait_for(connection.fetchval("SELECT 1"), LISTEN_PING_TIMEOUT_SECONDS)
+                logger.warning("Listener connection lost")
+            except asyncio.TimeoutError:
+                logger.warning("Listener connection stopped answering pings, reconnecting")
+            except Exception as e:
+                logger.error(f"Listener failed: {str(e)}")
+            finally:
+                self.listening = False
+                # Not close(): it waits on a server that may be gone
+                if not connection.is_closed():
+                    connection.terminate()
+
+            await asyncio.sleep(self.retry_seconds)
+
+
+pg_listener = PgListener()
@@ -0,0 +1,47 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..admin.round import round_cache
+from ..auth import require_admin
+from ..database import get_async_db
+from ..leaderboard.cache import leaderboard_cache
+from .broker import event_broker, leaderboard_event, round_event
+
+router = APIRouter()
+
+@router.get("/api/events")
+async def stream_events(db: AsyncSession = Depends(get_async_db)):
+    """
+    Server-Sent Events stream of leaderboard and round changes.
+
+    Starts with the full leaderboard and current round, then sends
+    `leaderboard_diff` events after rating updates and `round` events
+    when the round changes.
+    """
+    try:
+        # Read here rather than in the stream, which runs after the
+        # request's session is closed
+        snapshot = await leaderboard_cache.get(db)
+        current_round = await round_cache.get(db)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=str(e)
+        )
+
+    initial = [leaderboard_event(snapshot), round_event(current_round)]
+    return StreamingResponse(
+        event_broker.stream(initial),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.get("/api/admin/events/stats")
+async def get_event_stats(_: bool = Depends(require_admin)):
+    """Open event streams and broadcast counters for this worker process"""
+    return {
+        "subscribers": event_broker.subscriber_count,
+        "published": event_broker.published,
+        "disconnected_slow": event_broker.disconnected_slow
+    }
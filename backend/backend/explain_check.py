@@ -0,0 +1,154 @@
+"""
+Check that the hot queries of the API are served by an index.
+
+Each query is compiled the way the app sends it over asyncpg, PREPAREd,
+and EXPLAINed as EXECUTE under plan_cache_mode = force_generic_plan: the
+plan a reused prepared statement gets, which can't match a bound value
+against a partial index predicate. Sequential scans are disabled so the
+result doesn't depend on how much data a scratch database holds, and a
+table read by a Seq Scan or by an index scan without an Index Cond (a
+full index scan) fails. Exits non-zero if any query fails.
+
+    python -m backend.explain_check
+"""
+import argparse
+import asyncio
+import json
+import logging
+import sys
+from datetime import datetime
+from typing import Callable, Dict, List, Tuple
+
+from sqlalchemy import select
+
+from . import models
+from .admin.round import round_cache
+from .database import AsyncSessionLocal, async_engine
+from .matches.leases import expired_leases_query, renew_leases_statement
+from .matches.sampler import pool_query
+from .matches.seen_pairs import served_matches_query
+from .submissions.cache import latest_verified_query
+from .tasks.match_tasks import unrated_comparisons_query
+from .utils.match_generation import _verified_teams
+
+
+def _hot_queries(team_id: str, match_round: int) -> Dict[str, Tuple[str, object]]:
+    """name -> (table that must be read through an index condition, statement)"""
+    now = datetime.utcnow()
+
+    return {
+        "latest verified submissions": ("submissions", latest_verified_query([team_id], match_round)),
+        "verified teams of a round": ("submissions", _verified_teams(match_round)),
+        # GET /api/submissions/mine
+        "team submissions": ("submissions", select(models.Submission.submission_id)
+            .where(models.Submission.team_id == team_id)
+            .order_by(models.Submission.submitted_at.desc())),
+        "match pool": ("matches", pool_query(match_round)),
+        "reviewer leases": ("comparisons", renew_leases_statement(team_id, match_round, now)),
+        "expired leases": ("comparisons", expired_leases_query(now, 1000)),
+        "reviewer seen pairs": ("comparisons", served_matches_query(team_id, match_round)),
+        "unrated comparisons": ("comparisons", unrated_comparisons_query(now, 1000)),
+    }
+
+
+def _literal(value) -> str:
+    """
+    EXECUTE argument for a bound value. Left untyped, it takes the type of
+    the parameter it fills, which the compiled statement casts explicitly.
+    """
+    if value is None:
+        return "NULL"
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+async def _explain(connection, statement) -> dict:
+    """Generic plan of the statement as a prepared statement on asyncpg"""
+    compiled = statement.compile(dialect=async_engine.dialect, compile_kwargs={"render_postcompile": True})
+    arguments = ", ".join(_literal(compiled.params[name]) for name in compiled.positiontup or ())
+
+    # Without arguments, asyncpg sends these over the simple query protocol,
+    # leaving the $n placeholders to the PREPAREd statement
+    await connection.execute(f"PREPARE hot_query AS {compiled}")
+    try:
+        async with connection.transaction():
+            await connection.execute("SET LOCAL plan_cache_mode = force_generic_plan")
+            await connection.execute("SET LOCAL enable_seqscan = off")
+            execute = f"EXECUTE hot_query({arguments})" if arguments else "EXECUTE hot_query"
+            result = await connection.fetchval(f"EXPLAIN (FORMAT JSON) {execute}")
+    finally:
+        await connection.execute("DEALLOCATE hot_query")
+    return (json.loads(result) if isinstance(result, str) else result)[0]["Plan"]
+
+
+def _reads(plan: dict, table: str) -> List[dict]:
+    """
+    Scan nodes reading the table. A bitmap heap scan is replaced by its
+    bitmap index scans, which carry the index condition.
+    """
+    if plan.get("Relation Name") == table:
+        if plan["Node Type"] != "Bitmap Heap Scan":
+            return [plan]
+        return _bitmap_index_scans(plan)
+    reads = []
+    for child in plan.get("Plans", []):
+        reads.extend(_reads(child, table))
+    return reads
+
+
+def _bitmap_index_scans(plan: dict) -> List[dict]:
+    scans = []
+    for child in plan.get("Plans", []):
+        if child["Node Type"] == "Bitmap Index Scan":
+            scans.append(child)
+        else:
+            # BitmapAnd / BitmapOr
+            scans.extend(_bitmap_index_scans(child))
+    return scans
+
+
+def _full_scan(node: dict) -> bool:
+    return node["Node Type"] == "Seq Scan" or "Index Cond" not in node
+
+
+async def _check_hot_queries(report: Callable[[str], None]) -> bool:
+    async with AsyncSessionLocal() as db:
+        team_id = await db.scalar(select(models.Team.team_id).limit(1)) or "team"
+        match_round = await round_cache.get(db)
+
+    ok = True
+    async with async_engine.connect() as conn:
+        connection = (await conn.get_raw_connection()).driver_connection
+        for name, (table, statement) in _hot_queries(team_id, match_round).items():
+            reads = _reads(await _explain(connection, statement), table)
+            full_scans = [node for node in reads if _full_scan(node)]
+            if not reads:
+                ok = False
+                report(f"FAIL  {name}: {table} is not read")
+            elif full_scans:
+                ok = False
+                scans = ", ".join(
+                    f"{node['Node Type']} {node.get('Index Name', '')}".strip() for node in full_scans
+                )
+                report(f"FAIL  {name}: {table} is read in full ({scans})")
+            else:
+                used = ", ".join(sorted({node["Index Name"] for node in reads}))
+                report(f"ok    {name}: {used}")
+    await async_engine.dispose()
+    return ok
+
+
+def check_hot_queries(report: Callable[[str], None] = print) -> bool:
+    return asyncio.run(_check_hot_queries(report))
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    parser = argparse.ArgumentParser(description="EXPLAIN the hot queries and check each uses an index")
+    parser.parse_args()
+
+    sys.exit(0 if check_hot_queries() else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .. import models
+
+logger = logging.getLogger(__name__)
+
+# Upper bound on how stale a snapshot may get when another worker process
+# updated the leaderboard without going through this process' cache.
+LEADERBOARD_CACHE_TTL_SECONDS = float(os.getenv("LEADERBOARD_CACHE_TTL_SECONDS", "5"))
+
+
+@dataclass(frozen=True)
+class LeaderboardSnapshot:
+    version: int
+    entries: List[dict]
+    body: bytes
+    etag: str
+
+
+class LeaderboardCache:
+    """
+    Process-local, pre-serialized leaderboard.
+
+    Reads return the last built snapshot without touching the database.
+    Writers either patch individual teams (rating updates) or invalidate
+    the snapshot (team sync) so the next read rebuilds it.
+    """
+
+    def __init__(self, ttl_seconds: float = LEADERBOARD_CACHE_TTL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        # Lets one request rebuild an expired snapshot while the others wait for it
+        self._refresh_lock = asyncio.Lock()
+        self._entries: Dict[str, dict] = {}
+        self._snapshot: Optional[LeaderboardSnapshot] = None
+        self._version = 0
+        self._loaded_at = 0.0
+
+    async def get(self, db: AsyncSession) -> LeaderboardSnapshot:
+        """Return the current snapshot, rebuilding it from the database if missing or expired"""
+        snapshot = self._fresh_snapshot()
+        if snapshot is not None:
+            return snapshot
+        async with self._refresh_lock:
+            snapshot = self._fresh_snapshot()
+            if snapshot is not None:
+                return snapshot
+            return await self.refresh(db)
+
+    def _fresh_snapshot(self) -> Optional[LeaderboardSnapshot]:
+        snapshot = self._snapshot
+        if snapshot is not None and time.monotonic() - self._loaded_at < self.ttl_seconds:
+            return snapshot
+        return None
+
+    async def refresh(self, db: AsyncSession) -> LeaderboardSnapshot:
+        """Reload every leaderboard row from the database and rebuild the snapshot"""
+        started_version = self._version
+        rows = (await db.execute(
+            select(
+                models.Leaderboard.team_id,
+                models.Team.team_name,
+                models.Leaderboard.elo_score,
+                models.Leaderboard.wins,
+                models.Leaderboard.losses
+            ).join(
+                models.Team,
+                models.Leaderboard.team_id == models.Team.team_id
+            )
+        )).all()
+
+        with self._lock:
+            self._entries = {
+                team_id: {
+                    "team_id": team_id,
+                    "team_name": team_name,
+                    "score": int(elo_score or 0),
+                    "wins": wins or 0,
+                    "losses": losses or 0
+                }
+                for team_id, team_name, elo_score, wins, losses in rows
+            }
+            snapshot = self._rebuild()
+            # A patch landed while we were reading; our rows may predate it,
+            # so let the next read go back to the database.
+            self._loaded_at = 0.0 if started_version != snapshot.version - 1 else time.monotonic()
+            return snapshot
+
+    def apply_ratings(self, updates: Iterable[dict]) -> Optional[LeaderboardSnapshot]:
+        """
+        Patch teams in the snapshot after a committed rating change.
+
+        Each update is a dict with team_id, score, wins and losses. Unknown
+        teams invalidate the snapshot instead, since we don't have their names.
+        """
+        with self._lock:
+            if self._snapshot is None:
+                return None
+            for update in updates:
+                entry = self._entries.get(update["team_id"])
+                if entry is None:
+                    self._snapshot = None
+                    return None
+                entry["score"] = int(round(update["score"]))
+                entry["wins"] = update["wins"]
+                entry["losses"] = update["losses"]
+            return self._rebuild()
+
+    def invalidate(self) -> None:
+        """Drop the snapshot so the next read rebuilds it"""
+        with self._lock:
+            self._snapshot = None
+            self._version += 1
+
+    def _rebuild(self) -> LeaderboardSnapshot:
+        # Caller must hold self._lock
+        ordered = sorted(self._entries.values(), key=lambda e: (-e["score"], e["team_id"]))
+        entries = [dict(entry, rank=rank) for rank, entry in enumerate(ordered, start=1)]
+        body = json.dumps(entries, separators=(",", ":")).encode()
+        self._version += 1
+        self._snapshot = LeaderboardSnapshot(
+            version=self._version,
+            entries=entries,
+            body=body,
+            # Content-derived so ETags agree across worker processes
+            etag='"' + hashlib.md5(body).hexdigest() + '"'
+        )
+        return self._snapshot
+
+
+leaderboard_cache = LeaderboardCache()
@@ -1,10 +1,9 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from sqlalchemy import desc
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Header, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
 from pydantic import BaseModel
-from ..database import get_db
-from .. import models
+from ..database import get_async_db
+from .cache import leaderboard_cache
 
 router = APIRouter()
 
@@ -20,37 +19,22 @@ class LeaderboardEntry(BaseModel):
         orm_mode = True
 
 @router.get("/api/leaderboard", response_model=List[LeaderboardEntry])
-async def get_leaderboard(db: Session = Depends(get_db)):
+async def get_leaderboard(
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_db)
+):
     """Get sorted leaderboard with rankings"""
     try:
-        # Join leaderboard with teams to get team names
-        # Order by elo_score descending
-        results = db.query(
-            models.Leaderboard,
-            models.Team.team_name
-        ).join(
-            models.Team,
-            models.Leaderboard.team_id == models.Team.team_id
-        ).order_by(
-            desc(models.Leaderboard.elo_score)
-        ).all()
-
-        # Convert to response format with rankings
-        leaderboard = []
-        for rank, (record, team_name) in enumerate(results, start=1):
-            leaderboard.append({
-                "team_id": record.team_id,
-                "team_name": team_name,
-                "score": record.elo_score,
-                "wins": record.wins,
-                "losses": record.losses,
-                "rank": rank
-            })
-
-        return leaderboard
-
+        # Served from the in-process snapshot; only rebuilt when stale
+        snapshot = await leaderboard_cache.get(db)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=str(e)
-        ) 
\ No newline at end of file
+        )
+
+    headers = {"ETag": snapshot.etag, "Cache-Control": "no-cache"}
+    if if_none_match == snapshot.etag:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    return Response(content=snapshot.body, media_type="application/json", headers=headers)
@@ -1,14 +1,27 @@
 # main.py
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 from backend.auth.router import router as auth_router
 from backend.submissions.router import router as submissions_router
 from backend.matches.router import router as matches_router
 from backend.admin.routes import router as admin_router
 from backend.leaderboard.router import router as leaderboard_router
-from backend.database import engine, SessionLocal
-from backend.models.base import Base
-from backend.utils.leaderboard_sync import sync_teams_to_leaderboard
+from backend.events.router import router as events_router
+from backend.bootstrap import BOOTSTRAP_ON_STARTUP, bootstrap_database
+from backend.matches.rating_worker import rating_worker
+from backend.auth.utils import password_hash_pool
+from backend.admin.round import round_cache
+from backend.auth.dependencies import token_cache
+from backend.database import pool_status
+from backend.events.broker import event_broker
+from backend.events.listener import pg_listener
+from backend.utils.metrics import MetricsMiddleware, metrics
+from backend.utils.scheduler import TaskScheduler
+from backend.tasks.match_tasks import RECONCILE_INTERVAL_SECONDS, process_matches
+import os
 import logging
 
 # Configure logging
@@ -19,17 +32,42 @@ logging.basicConfig(
 
 logger = logging.getLogger(__name__)
 
-# Create database tables
-Base.metadata.create_all(bind=engine)
+# Periodic reconciler (see tasks/match_tasks.py); takes an advisory lock,
+# so with several workers only one of them does the work each interval
+RECONCILER_ENABLED = os.getenv("RECONCILER_ENABLED", "true").lower() in ("1", "true", "yes")
 
-# Sync teams to leaderboard
-db = SessionLocal()
-try:
-    sync_teams_to_leaderboard(db)
-finally:
-    db.close()
+scheduler = TaskScheduler()
 
-app = FastAPI(title="GenAI Workshop Competition API")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if BOOTSTRAP_ON_STARTUP:
+        # Create tables and sync teams. Only the first worker does it; the
+        # others wait for it to finish rather than repeat it, so no worker
+        # serves requests before the schema exists.
+        await run_in_threadpool(bootstrap_database, wait=True)
+    await rating_worker.start()
+    round_cache.start()
+    # One LISTEN connection for the round and rating changes of other workers
+    await pg_listener.start()
+    if RECONCILER_ENABLED:
+        scheduler.schedule_interval_task(
+            process_matches,
+            seconds=RECONCILE_INTERVAL_SECONDS,
+            task_id="process_matches",
+            max_instances=1,
+            coalesce=True
+        )
+        await scheduler.start()
+    try:
+        yield
+    finally:
+        scheduler.shutdown()
+        await pg_listener.stop()
+        # Flush queued rating updates before the process exits
+        await rating_worker.stop()
+        password_hash_pool.shutdown()
+
+app = FastAPI(title="GenAI Workshop Competition API", lifespan=lifespan)
 
 # Configure CORS
 app.add_middleware(
@@ -39,6 +77,7 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(MetricsMiddleware)
 
 # Include routers
 app.include_router(auth_router)
@@ -46,8 +85,30 @@ app.include_router(submissions_router)
 app.include_router(admin_router)
 app.include_router(matches_router)
 app.include_router(leaderboard_router)
+app.include_router(events_router)
 
 @app.get("/")
 async def root():
     return {"message": "Welcome to GenAI Workshop Competition API"}
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """Prometheus metrics for this worker process"""
+    return PlainTextResponse(
+        metrics.render({
+            "db_pool": pool_status(),
+            "password_hash_pool": {"": password_hash_pool.stats()},
+            "rating_worker": {"": {
+                "queue_depth": rating_worker.queue_depth,
+                "applied": rating_worker.applied,
+                "failed": rating_worker.failed
+            }},
+            "event_stream": {"": {
+                "subscribers": event_broker.subscriber_count,
+                "published": event_broker.published,
+                "disconnected_slow": event_broker.disconnected_slow
+            }},
+            "token_cache": {"": {"hits": token_cache.hits, "misses": token_cache.misses}}
+        }),
+        media_type="text/plain; version=0.0.4"
+    )
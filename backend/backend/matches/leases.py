@@ -0,0 +1,72 @@
+import os
+from datetime import datetime, timedelta
+from typing import List
+
+from sqlalchemy import delete, literal_column, select, update
+from sqlalchemy.engine import Row
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from .. import models
+
+# Inlined rather than bound, so it matches the predicate of the partial
+# indexes on pending comparisons even under a generic (prepared) plan
+PENDING = literal_column("'pending'")
+
+# How long a reviewer holds a pending comparison. Asking for the next match
+# again within the lease returns the same comparison and renews it.
+COMPARISON_LEASE_MINUTES = int(os.getenv("COMPARISON_LEASE_MINUTES", "30"))
+
+
+def lease_expiry(now: datetime) -> datetime:
+    return now + timedelta(minutes=COMPARISON_LEASE_MINUTES)
+
+
+def renew_leases_statement(reviewer_id: str, match_round: int, now: datetime):
+    """Served by idx_comparisons_pending_reviewer"""
+    return update(models.Comparison)\
+        .where(
+            models.Comparison.reviewer_id == reviewer_id,
+            models.Comparison.comparison_status == PENDING,
+            models.Comparison.lease_expires_at > now,
+            models.Comparison.match_round == match_round
+        )\
+        .values(lease_expires_at=lease_expiry(now))\
+        .returning(
+            models.Comparison.comparison_id,
+            models.Comparison.submission_1_id,
+            models.Comparison.submission_2_id
+        )
+
+
+def expired_leases_query(now: datetime, limit: int):
+    """Served by idx_comparisons_pending_lease"""
+    return select(models.Comparison.comparison_id)\
+        .where(
+            models.Comparison.comparison_status == PENDING,
+            models.Comparison.lease_expires_at < now
+        )\
+        .order_by(models.Comparison.lease_expires_at)\
+        .limit(limit)
+
+
+async def renew_leases(db: AsyncSession, reviewer_id: str, match_round: int, now: datetime) -> List[Row]:
+    """
+    Renew and return the reviewer's unexpired pending comparisons in the
+    round, oldest first
+    """
+    rows = (await db.execute(renew_leases_statement(reviewer_id, match_round, now))).all()
+    return sorted(rows, key=lambda row: row.comparison_id)
+
+
+def expire_leases(db: Session, now: datetime, limit: int) -> int:
+    """Delete up to limit pending comparisons whose lease ran out"""
+    expired = expired_leases_query(now, limit)\
+        .with_for_update(skip_locked=True)\
+        .scalar_subquery()
+
+    deleted = db.execute(
+        delete(models.Comparison).where(models.Comparison.comparison_id.in_(expired))
+    ).rowcount
+    db.commit()
+    return deleted
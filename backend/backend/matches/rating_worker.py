@@ -0,0 +1,298 @@
+import asyncio
+import json
+import logging
+import os
+import uuid
+from collections import deque
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, Deque, Iterable, List, Optional
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import func, select, update
+from sqlalchemy.orm import Session
+
+from .. import models
+from ..database import AsyncSessionLocal, SessionLocal
+from ..events.broker import event_broker, leaderboard_diff_event, leaderboard_event
+from ..events.listener import pg_listener
+from ..leaderboard.cache import leaderboard_cache
+from ..utils.calculate_score import calculate_elo_change
+from .sampler import match_sampler
+
+logger = logging.getLogger(__name__)
+
+RATING_BATCH_SIZE = int(os.getenv("RATING_BATCH_SIZE", "200"))
+
+# Transaction-level advisory lock taken by every writer of Elo ratings.
+# Serializes rating updates across all worker processes without locking
+# the leaderboard table for readers.
+RATINGS_LOCK_KEY = 0x454C4F  # "ELO"
+
+# Rating changes are relayed over this channel to the leaderboard caches and
+# event streams of every other worker process
+LEADERBOARD_CHANNEL = "leaderboard"
+# Teams per notification; keeps payloads well under Postgres' 8000 byte limit
+NOTIFY_CHUNK_SIZE = 50
+# Unique per host and import; workers forked from a preloaded app share it,
+# so process_id() adds the pid
+_INSTANCE_ID = uuid.uuid4().hex
+
+
+def process_id() -> str:
+    """Tells this process' own notifications apart from the others'"""
+    return f"{_INSTANCE_ID}-{os.getpid()}"
+
+
+def leaderboard_notify(message: dict):
+    """pg_notify statement for LEADERBOARD_CHANNEL; delivered when the transaction commits"""
+    return select(func.pg_notify(LEADERBOARD_CHANNEL, json.dumps({"origin": process_id(), **message})))
+
+
+@dataclass(frozen=True)
+class RatingResult:
+    comparison_id: int
+    winner_team_id: str
+    loser_team_id: str
+
+
+def update_team_ratings(db: Session, results: List[RatingResult]) -> List[dict]:
+    """
+    Apply a batch of completed comparisons to the leaderboard in one transaction.
+
+    Results are applied in the given order. Comparisons that were already
+    rated (or are not completed) are skipped, so replaying a batch is safe.
+
+    Returns the new leaderboard values of every team that changed.
+    """
+    db.execute(select(func.pg_advisory_xact_lock(RATINGS_LOCK_KEY)))
+
+    team_ids = {r.winner_team_id for r in results} | {r.loser_team_id for r in results}
+    records = {
+        record.team_id: record
+        for record in db.query(models.Leaderboard).filter(
+            models.Leaderboard.team_id.in_(team_ids)
+        ).all()
+    }
+
+    rateable = []
+    for result in results:
+        if result.winner_team_id in records and result.loser_team_id in records:
+            rateable.append(result)
+        else:
+            logger.error(
+                f"Leaderboard records not found for teams {result.winner_team_id}, "
+                f"{result.loser_team_id} (comparison {result.comparison_id})"
+            )
+    if not rateable:
+        db.rollback()
+        return []
+
+    current_time = datetime.utcnow()
+
+    # Claim the comparisons; anything already rated is dropped here. The
+    # verdict is taken from the row, not the queued result, so ratings always
+    # agree with what comparisons holds. The two teams are the same either way.
+    claimed = {
+        row.comparison_id: row
+        for row in db.execute(
+            update(models.Comparison)
+            .where(
+                models.Comparison.comparison_id.in_([r.comparison_id for r in rateable]),
+                models.Comparison.comparison_status == 'completed',
+                models.Comparison.rated_at.is_(None)
+            )
+            .values(rated_at=current_time)
+            .returning(
+                models.Comparison.comparison_id,
+                models.Comparison.winner_team_id,
+                models.Comparison.loser_team_id
+            )
+        )
+    }
+    applied = len(claimed)
+
+    changed = {}
+    for result in rateable:
+        # Popped, so a comparison queued twice is applied once
+        row = claimed.pop(result.comparison_id, None)
+        if row is None:
+            continue
+
+        winner_record = records[row.winner_team_id]
+        loser_record = records[row.loser_team_id]
+
+        new_winner_rating, new_loser_rating = calculate_elo_change(
+            team1_rating=winner_record.elo_score,
+            team2_rating=loser_record.elo_score,
+            result=1.0  # Winner is always team1 in this case
+        )
+
+        # elo_score is an integer column; round here so later results in the
+        # same batch see exactly what gets stored
+        winner_record.elo_score = round(new_winner_rating)
+        loser_record.elo_score = round(new_loser_rating)
+        winner_record.wins += 1
+        loser_record.losses += 1
+        winner_record.last_updated = current_time
+        loser_record.last_updated = current_time
+
+        changed[winner_record.team_id] = winner_record
+        changed[loser_record.team_id] = loser_record
+
+    # Capture values before commit expires the ORM attributes
+    rating_updates = [
+        {
+            "team_id": record.team_id,
+            "score": record.elo_score,
+            "wins": record.wins,
+            "losses": record.losses
+        } for record in changed.values()
+    ]
+    for i in range(0, len(rating_updates), NOTIFY_CHUNK_SIZE):
+        db.execute(leaderboard_notify({"teams": rating_updates[i:i + NOTIFY_CHUNK_SIZE]}))
+
+    db.commit()
+
+    logger.info(f"Applied {applied} comparison results to {len(rating_updates)} teams")
+    return rating_updates
+
+
+class RatingUpdateWorker:
+    """
+    Single in-process consumer of completed comparisons.
+
+    Request handlers enqueue results after committing the comparison; the
+    worker drains them in order and applies them in batches with its own
+    database sessions, off the event loop.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session] = SessionLocal,
+        batch_size: int = RATING_BATCH_SIZE
+    ):
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self._pending: Deque[RatingResult] = deque()
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+        # Held while a batch is being applied
+        self.lock = asyncio.Lock()
+        self._snapshot_tasks = set()
+        self.applied = 0
+        self.failed = 0
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._pending)
+
+    def enqueue(self, result: RatingResult) -> None:
+        self._pending.append(result)
+        self._wakeup.set()
+
+    def enqueue_many(self, results: Iterable[RatingResult]) -> None:
+        self._pending.extend(results)
+        self._wakeup.set()
+
+    async def start(self) -> None:
+        """Start draining the queue; call before pg_listener.start()"""
+        pg_listener.subscribe(LEADERBOARD_CHANNEL, self._on_notify, self._resync)
+        self._stopping = False
+        self._task = asyncio.create_task(self._run())
+        logger.info("Rating update worker started")
+
+    async def stop(self) -> None:
+        """Drain whatever is queued, then stop"""
+        if self._task is None:
+            return
+        self._stopping = True
+        self._wakeup.set()
+        await self._task
+        self._task = None
+        logger.info("Rating update worker stopped")
+
+    async def _run(self) -> None:
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+
+            while self._pending:
+                batch = [
+                    self._pending.popleft()
+                    for _ in range(min(self.batch_size, len(self._pending)))
+                ]
+                async with self.lock:
+                    await run_in_threadpool(self._process_batch, batch)
+
+            if self._stopping:
+                return
+
+    def _on_notify(self, connection, pid, channel, payload) -> None:
+        """Apply rating changes made by another worker process"""
+        try:
+            message = json.loads(payload)
+        except ValueError:
+            logger.error(f"Ignoring malformed {LEADERBOARD_CHANNEL} notification: {payload[:200]!r}")
+            return
+        if message.get("origin") == process_id():
+            return
+
+        if message.get("reset"):
+            # Every score may have changed (rating replay)
+            self._publish_snapshot()
+            return
+
+        teams = message.get("teams", [])
+        snapshot = leaderboard_cache.apply_ratings(teams)
+        match_sampler.ratings_changed(teams)
+        event_broker.publish(leaderboard_diff_event(snapshot.version if snapshot else None, teams))
+
+    async def _resync(self, connection) -> None:
+        # Diffs sent while we weren't listening are lost; start over from a snapshot
+        self._publish_snapshot()
+
+    def _publish_snapshot(self) -> None:
+        leaderboard_cache.invalidate()
+        task = asyncio.create_task(self._load_and_publish())
+        self._snapshot_tasks.add(task)
+        task.add_done_callback(self._snapshot_tasks.discard)
+
+    async def _load_and_publish(self) -> None:
+        try:
+            async with AsyncSessionLocal() as db:
+                event_broker.publish(leaderboard_event(await leaderboard_cache.get(db)))
+        except Exception as e:
+            logger.error(f"Could not publish leaderboard snapshot: {str(e)}")
+
+    def _process_batch(self, batch: List[RatingResult]) -> None:
+        """Apply a batch with one retry"""
+        for attempt in range(2):
+            db = self.session_factory()
+            try:
+                rating_updates = update_team_ratings(db, batch)
+                snapshot = leaderboard_cache.apply_ratings(rating_updates)
+                match_sampler.ratings_changed(rating_updates)
+                self.applied += len(batch)
+                if rating_updates:
+                    event_broker.publish(leaderboard_diff_event(
+                        snapshot.version if snapshot else None,
+                        rating_updates
+                    ))
+                return
+            except Exception as e:
+                db.rollback()
+                logger.error(f"Error updating ratings (attempt {attempt + 1}): {str(e)}")
+            finally:
+                db.close()
+
+        self.failed += len(batch)
+        # Left with rated_at NULL in the database, so they can be re-applied later
+        logger.error(
+            "Failed to update ratings after retry for comparisons "
+            f"{[r.comparison_id for r in batch]}"
+        )
+
+
+rating_worker = RatingUpdateWorker()
@@ -1,180 +1,185 @@
-from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks
-from sqlalchemy.orm import Session
-from sqlalchemy import func
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy import select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
 from datetime import datetime
+from typing import Optional, Union
 import logging
 from .. import models
 from . import schemas
 from ..auth.dependencies import get_current_team_id
-from ..database import get_db
-from ..utils.calculate_score import calculate_elo_change
-from ..admin.routes import CURRENT_ROUND
+from ..database import get_async_db
+from ..admin.round import round_cache
+from .rating_worker import rating_worker, RatingResult
+from .leases import lease_expiry, renew_leases
+from .sampler import match_sampler
+from .seen_pairs import seen_pairs
+from ..submissions.cache import verified_submission_cache
 
 router = APIRouter()
 
-@router.get("/matches/next", response_model=schemas.MatchResponse)
+@router.get("/matches/next", response_model=Union[schemas.MatchResponse, schemas.MatchBatchResponse])
 async def get_next_match(
-    db: Session = Depends(get_db),
+    count: Optional[int] = Query(None, ge=1, le=schemas.MATCH_PREFETCH_MAX),
+    db: AsyncSession = Depends(get_async_db),
     team_id: models.Team = Depends(get_current_team_id)
 ):
-    """Get next random match for review"""
-    # Get random match where current user is not involved
-    random_match = db.query(models.Match)\
-        .filter(
-            models.Match.team1_id != team_id,
-            models.Match.team2_id != team_id,
-            models.Match.match_round == CURRENT_ROUND
-        )\
-        .order_by(func.random())\
-        .first()
-    
-    if not random_match:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="No matches available"
-        )
+    """
+    Get next random match for review.
 
-    # Get latest verified submissions for both teams
-    submission1 = db.query(models.Submission)\
-        .filter(
-            models.Submission.team_id == random_match.team1_id,
-            models.Submission.status == 'verified',
-            models.Submission.match_round == CURRENT_ROUND
-        )\
-        .order_by(models.Submission.submitted_at.desc())\
-        .first()
-        
-    submission2 = db.query(models.Submission)\
-        .filter(
-            models.Submission.team_id == random_match.team2_id,
-            models.Submission.status == 'verified',
-            models.Submission.match_round == CURRENT_ROUND
-        )\
-        .order_by(models.Submission.submitted_at.desc())\
-        .first()
-
-    if not submission1 or not submission2:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Verified submissions not found for both teams"
+    With count, reserves up to that many distinct matches at once so the
+    client can prefetch; fewer are returned when the round is small.
+
+    Matches are leased to the reviewer: their unexpired pending comparisons
+    are renewed and returned first, and new ones are only reserved for the
+    shortfall, so asking again doesn't leave abandoned rows behind.
+    """
+    current_round = await round_cache.get(db)
+    wanted = count or 1
+    now = datetime.utcnow()
+
+    # (comparison_id, submission1, submission2)
+    reserved = []
+    leased = (await renew_leases(db, team_id, current_round, now))[:wanted]
+    if leased:
+        submission_ids = {
+            submission_id
+            for row in leased
+            for submission_id in (row.submission_1_id, row.submission_2_id)
+        }
+        leased_submissions = {
+            row.submission_id: row
+            for row in (await db.execute(
+                select(
+                    models.Submission.submission_id,
+                    models.Submission.prompt,
+                    models.Submission.response,
+                    models.Team.team_name
+                )
+                .join(models.Team, models.Submission.team_id == models.Team.team_id)
+                .where(models.Submission.submission_id.in_(submission_ids))
+            )).all()
+        }
+        reserved = [
+            (row.comparison_id, leased_submissions[row.submission_1_id], leased_submissions[row.submission_2_id])
+            for row in leased
+            if row.submission_1_id in leased_submissions and row.submission_2_id in leased_submissions
+        ]
+
+    pairs = []
+    if len(reserved) < wanted:
+        # Matches the current user is not involved in and hasn't been served before
+        seen = await seen_pairs.get(db, team_id, current_round)
+        sampled = await match_sampler.sample_many(
+            db, current_round, team_id, wanted - len(reserved), exclude=seen
         )
 
-    # Create new comparison
-    comparison = models.Comparison(
-        submission_1_id=submission1.submission_id,
-        submission_2_id=submission2.submission_id,
-        match_round=CURRENT_ROUND,
-        comparison_status='pending'
-    )
-    db.add(comparison)
-    
+        # Latest verified submissions (with team names) of every team involved
+        submissions = await verified_submission_cache.get_many(
+            db,
+            [team for match in sampled for team in (match.team1_id, match.team2_id)],
+            current_round
+        ) if sampled else {}
+        held = {
+            frozenset((submission1.submission_id, submission2.submission_id))
+            for _, submission1, submission2 in reserved
+        }
+        paired = [
+            match for match in sampled
+            if match.team1_id in submissions and match.team2_id in submissions
+            and frozenset((submissions[match.team1_id].submission_id,
+                           submissions[match.team2_id].submission_id)) not in held
+        ]
+        pairs = [(submissions[match.team1_id], submissions[match.team2_id]) for match in paired]
+
+        if not reserved and not pairs:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="No matches available" if not sampled
+                else "Verified submissions not found for both teams"
+            )
+
     try:
-        db.commit()
+        if pairs:
+            # One multi-row INSERT ... RETURNING. uq_comparisons_reviewer_pair
+            # skips pairs the reviewer was already served, also by another
+            # worker or a concurrent request the seen set didn't show yet.
+            inserted = {
+                (row.submission_1_id, row.submission_2_id): row.comparison_id
+                for row in (await db.execute(
+                    insert(models.Comparison).on_conflict_do_nothing().returning(
+                        models.Comparison.comparison_id,
+                        models.Comparison.submission_1_id,
+                        models.Comparison.submission_2_id
+                    ),
+                    [
+                        {
+                            "submission_1_id": submission1.submission_id,
+                            "submission_2_id": submission2.submission_id,
+                            "match_round": current_round,
+                            "comparison_status": 'pending',
+                            "reviewer_id": team_id,
+                            "lease_expires_at": lease_expiry(now)
+                        } for submission1, submission2 in pairs
+                    ]
+                )).all()
+            }
+            reserved += [
+                (inserted[(submission1.submission_id, submission2.submission_id)], submission1, submission2)
+                for submission1, submission2 in pairs
+                if (submission1.submission_id, submission2.submission_id) in inserted
+            ]
+        await db.commit()
+        if pairs:
+            # Skipped pairs were served before, so they are seen too
+            seen_pairs.mark(team_id, current_round, [match.match_id for match in paired])
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=str(e)
         )
 
-    # Get team names
-    team1 = db.query(models.Team).get(random_match.team1_id)
-    team2 = db.query(models.Team).get(random_match.team2_id)
-    
-    return {
-        "comparison_id": comparison.comparison_id,
-        "submission1": {
-            "submission_id": submission1.submission_id,
-            "prompt": submission1.prompt,
-            "response": submission1.response
-        },
-        "submission2": {
-            "submission_id": submission2.submission_id,
-            "prompt": submission2.prompt,
-            "response": submission2.response
-        },
-        "team1_name": team1.team_name,
-        "team2_name": team2.team_name
-    }
-
-async def update_team_ratings(db: Session, winner_team_id: int, loser_team_id: int):
-    """Update team ratings in the leaderboard after a match"""
-    try:
-        # Fetch current ratings
-        winner_record = db.query(models.Leaderboard).filter(
-            models.Leaderboard.team_id == winner_team_id
-        ).first()
-        loser_record = db.query(models.Leaderboard).filter(
-            models.Leaderboard.team_id == loser_team_id
-        ).first()
-        
-        if not winner_record or not loser_record:
-            logging.error(f"Leaderboard records not found for teams {winner_team_id}, {loser_team_id}")
-            return False
-            
-        # Calculate new ratings
-        new_winner_rating, new_loser_rating = calculate_elo_change(
-            team1_rating=winner_record.elo_score,
-            team2_rating=loser_record.elo_score,
-            result=1.0  # Winner is always team1 in this case
-        )
-        
-        # Update ratings and win/loss counts
-        winner_record.elo_score = new_winner_rating
-        loser_record.elo_score = new_loser_rating
-        
-        # Update win/loss counts
-        winner_record.wins += 1
-        loser_record.losses += 1
-        
-        # Update last match timestamp
-        current_time = datetime.utcnow()
-        winner_record.last_match_at = current_time
-        loser_record.last_match_at = current_time
-        winner_record.last_updated = current_time
-        loser_record.last_updated = current_time
-        
-        db.commit()
-        
-        logging.info(
-            f"Updated ratings - Winner Team {winner_team_id}: {new_winner_rating}, "
-            f"Loser Team {loser_team_id}: {new_loser_rating}"
+    if not reserved:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No matches available"
         )
-        return True
-        
-    except Exception as e:
-        db.rollback()
-        logging.error(f"Error updating ratings: {str(e)}")
-        return False
 
-async def process_ratings_background(db: Session, winner_team_id: int, loser_team_id: int):
-    """Background task to process ratings with one retry"""
-    success = False
-    
-    # First attempt
-    success = await update_team_ratings(db, winner_team_id, loser_team_id)
-    
-    # Retry once if failed
-    if not success:
-        logging.info("Retrying rating update...")
-        success = await update_team_ratings(db, winner_team_id, loser_team_id)
-        
-    if not success:
-        logging.error("Failed to update ratings after retry")
+    matches = [
+        {
+            "comparison_id": comparison_id,
+            "submission1": {
+                "submission_id": submission1.submission_id,
+                "prompt": submission1.prompt,
+                "response": submission1.response
+            },
+            "submission2": {
+                "submission_id": submission2.submission_id,
+                "prompt": submission2.prompt,
+                "response": submission2.response
+            },
+            "team1_name": submission1.team_name,
+            "team2_name": submission2.team_name
+        } for comparison_id, submission1, submission2 in reserved
+    ]
+    return matches[0] if count is None else {"matches": matches}
 
 @router.post("/api/comparisons/{comparison_id}/submit")
 async def submit_comparison(
     comparison_id: int,
     submission: schemas.ComparisonSubmit,
-    background_tasks: BackgroundTasks,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     team_id: models.Team = Depends(get_current_team_id)
 ):
     """Submit comparison results"""
     logging.info(f"Received comparison submission: {submission}")
     logging.info(f"Comparison ID: {comparison_id}, Team ID: {team_id}")
     
-    comparison = db.query(models.Comparison).get(comparison_id)
+    # Row lock keeps a concurrent submit of the same comparison waiting until
+    # this one commits, after which it sees the comparison completed
+    comparison = await db.get(models.Comparison, comparison_id, with_for_update=True)
     if not comparison:
         logging.error(f"Comparison not found: {comparison_id}")
         raise HTTPException(
@@ -190,6 +195,12 @@ async def submit_comparison(
             detail="Comparison already completed"
         )
     
+    if comparison.reviewer_id is not None and comparison.reviewer_id != team_id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Comparison is reserved by another reviewer"
+        )
+    
     # Validate submission IDs match the comparison
     valid_submissions = {comparison.submission_1_id, comparison.submission_2_id}
     if not (submission.winner_submission_id in valid_submissions and 
@@ -200,8 +211,8 @@ async def submit_comparison(
         )
     
     # Get submissions and their team IDs
-    winner_submission = db.query(models.Submission).get(submission.winner_submission_id)
-    loser_submission = db.query(models.Submission).get(submission.loser_submission_id)
+    winner_submission = await db.get(models.Submission, submission.winner_submission_id)
+    loser_submission = await db.get(models.Submission, submission.loser_submission_id)
     
     if not winner_submission or not loser_submission:
         raise HTTPException(
@@ -220,21 +231,121 @@ async def submit_comparison(
     comparison.completed_at = datetime.utcnow()
     
     try:
-        db.commit()
+        await db.commit()
         
-        # Add rating update to background tasks
-        background_tasks.add_task(
-            process_ratings_background,
-            db,
-            winner_submission.team_id,
-            loser_submission.team_id
-        )
+        # Hand the result to the serialized rating worker
+        rating_worker.enqueue(RatingResult(
+            comparison_id=comparison_id,
+            winner_team_id=winner_submission.team_id,
+            loser_team_id=loser_submission.team_id
+        ))
         
         return {"status": "success"}
         
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=str(e)
-        ) 
\ No newline at end of file
+        ) 
+
+@router.post("/api/comparisons/submit-batch", response_model=schemas.ComparisonBatchResult)
+async def submit_comparison_batch(
+    batch: schemas.ComparisonBatchSubmit,
+    db: AsyncSession = Depends(get_async_db),
+    team_id: models.Team = Depends(get_current_team_id)
+):
+    """
+    Submit many comparison results in one transaction.
+
+    Valid verdicts are applied; the rest are returned with a reason.
+    """
+    rejected = []
+    verdicts = {}
+    for verdict in batch.verdicts:
+        if verdict.comparison_id in verdicts:
+            rejected.append({"comparison_id": verdict.comparison_id, "reason": "duplicate_in_batch"})
+        else:
+            verdicts[verdict.comparison_id] = verdict
+
+    submission1 = aliased(models.Submission)
+    submission2 = aliased(models.Submission)
+    # Row locks keep a concurrent submit from completing the same comparisons
+    rows = (await db.execute(
+        select(
+            models.Comparison.comparison_id,
+            models.Comparison.comparison_status,
+            models.Comparison.reviewer_id,
+            models.Comparison.submission_1_id,
+            models.Comparison.submission_2_id,
+            submission1.team_id.label("team_1_id"),
+            submission2.team_id.label("team_2_id")
+        )
+        .join(submission1, submission1.submission_id == models.Comparison.submission_1_id)
+        .join(submission2, submission2.submission_id == models.Comparison.submission_2_id)
+        .where(models.Comparison.comparison_id.in_(verdicts))
+        .with_for_update(of=models.Comparison)
+    )).all()
+    comparisons = {row.comparison_id: row for row in rows}
+
+    completed_at = datetime.utcnow()
+    updates = []
+    results = []
+    for comparison_id, verdict in verdicts.items():
+        comparison = comparisons.get(comparison_id)
+        if comparison is None:
+            rejected.append({"comparison_id": comparison_id, "reason": "not_found"})
+            continue
+        if comparison.comparison_status != 'pending':
+            rejected.append({"comparison_id": comparison_id, "reason": "already_completed"})
+            continue
+        if comparison.reviewer_id is not None and comparison.reviewer_id != team_id:
+            rejected.append({"comparison_id": comparison_id, "reason": "reserved_by_another_reviewer"})
+            continue
+
+        teams = {
+            comparison.submission_1_id: comparison.team_1_id,
+            comparison.submission_2_id: comparison.team_2_id
+        }
+        if (verdict.winner_submission_id == verdict.loser_submission_id
+                or verdict.winner_submission_id not in teams
+                or verdict.loser_submission_id not in teams):
+            rejected.append({"comparison_id": comparison_id, "reason": "invalid_submission_ids"})
+            continue
+
+        winner_team_id = teams[verdict.winner_submission_id]
+        loser_team_id = teams[verdict.loser_submission_id]
+        updates.append({
+            "comparison_id": comparison_id,
+            "winner_submission_id": verdict.winner_submission_id,
+            "loser_submission_id": verdict.loser_submission_id,
+            "winner_team_id": winner_team_id,
+            "loser_team_id": loser_team_id,
+            "score_difference": verdict.score_difference,
+            "reviewer_id": team_id,
+            "comparison_status": 'completed',
+            "completed_at": completed_at
+        })
+        results.append(RatingResult(
+            comparison_id=comparison_id,
+            winner_team_id=winner_team_id,
+            loser_team_id=loser_team_id
+        ))
+
+    try:
+        if updates:
+            # Bulk UPDATE by primary key, sent as one executemany
+            await db.execute(update(models.Comparison), updates)
+        await db.commit()
+    except Exception as e:
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=str(e)
+        )
+
+    # Queued together, so the worker applies them in one rating transaction
+    rating_worker.enqueue_many(results)
+
+    logging.info(f"Batch comparison submission by {team_id}: {len(updates)} accepted, {len(rejected)} rejected")
+    return {"accepted": len(updates), "rejected": rejected}
@@ -0,0 +1,128 @@
+import asyncio
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Container, Dict, Iterable, List, Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .. import models
+from .strategy import MatchStrategy, create_strategy
+
+logger = logging.getLogger(__name__)
+
+# How long a round's pool is trusted before reloading it; bounds how long a
+# worker process can miss matches generated by another process
+MATCH_POOL_TTL_SECONDS = float(os.getenv("MATCH_POOL_TTL_SECONDS", "30"))
+# Empty pools are rechecked sooner so the first matches of a round show up quickly
+EMPTY_POOL_TTL_SECONDS = 2.0
+
+
+@dataclass(frozen=True)
+class PooledMatch:
+    match_id: int
+    team1_id: str
+    team2_id: str
+
+
+@dataclass
+class RoundPool:
+    matches: List[PooledMatch] = field(default_factory=list)
+    match_ids: set = field(default_factory=set)
+    loaded_at: float = 0.0
+
+
+def pool_query(match_round: int):
+    return select(
+        models.Match.match_id,
+        models.Match.team1_id,
+        models.Match.team2_id
+    ).where(
+        models.Match.match_round == match_round
+    )
+
+
+class MatchSampler:
+    """
+    Per-round in-memory pool of matches; which ones are served is up to the
+    MatchStrategy (MATCH_STRATEGY).
+    """
+
+    def __init__(self, ttl_seconds: float = MATCH_POOL_TTL_SECONDS, strategy: Optional[MatchStrategy] = None):
+        self.ttl_seconds = ttl_seconds
+        self.strategy = strategy or create_strategy()
+        self._lock = threading.Lock()
+        self._pools: Dict[int, RoundPool] = {}
+        # One loader per round; concurrent requests wait for its result
+        self._load_locks: Dict[int, asyncio.Lock] = {}
+
+    async def sample_many(
+        self,
+        db: AsyncSession,
+        match_round: int,
+        reviewer_id: str,
+        count: int,
+        exclude: Container[int] = ()
+    ) -> List[PooledMatch]:
+        """
+        Pick up to count distinct matches that the reviewer's team is not
+        part of, skipping the match ids in exclude
+        """
+        matches = (await self._get_pool(db, match_round)).matches
+        if not matches:
+            return []
+        return self.strategy.choose(match_round, matches, reviewer_id, count, exclude)
+
+    def ratings_changed(self, updates: Iterable[dict]) -> None:
+        """Called by the rating worker with the teams whose rating changed"""
+        self.strategy.ratings_changed(updates)
+
+    def add(self, match_round: int, matches: Iterable[PooledMatch]) -> None:
+        """Add newly created matches to a loaded pool"""
+        with self._lock:
+            pool = self._pools.get(match_round)
+            if pool is None:
+                return
+            added = [match for match in matches if match.match_id not in pool.match_ids]
+            for match in added:
+                pool.match_ids.add(match.match_id)
+                pool.matches.append(match)
+        self.strategy.matches_added(match_round, added)
+
+    async def _get_pool(self, db: AsyncSession, match_round: int) -> RoundPool:
+        pool = self._fresh_pool(match_round)
+        if pool is not None:
+            return pool
+        async with self._load_locks.setdefault(match_round, asyncio.Lock()):
+            pool = self._fresh_pool(match_round)
+            if pool is not None:
+                return pool
+            return await self._load_pool(db, match_round)
+
+    def _fresh_pool(self, match_round: int) -> Optional[RoundPool]:
+        pool = self._pools.get(match_round)
+        if pool is not None:
+            ttl = self.ttl_seconds if pool.matches else EMPTY_POOL_TTL_SECONDS
+            if time.monotonic() - pool.loaded_at < ttl:
+                return pool
+        return None
+
+    async def _load_pool(self, db: AsyncSession, match_round: int) -> RoundPool:
+        rows = (await db.execute(pool_query(match_round))).all()
+
+        pool = RoundPool(
+            matches=[PooledMatch(match_id, team1_id, team2_id) for match_id, team1_id, team2_id in rows],
+            loaded_at=time.monotonic()
+        )
+        pool.match_ids = {match.match_id for match in pool.matches}
+        await self.strategy.pool_loaded(db, match_round, pool.matches)
+        with self._lock:
+            self._pools[match_round] = pool
+        logger.info(f"Loaded {len(pool.matches)} matches into the pool for round {match_round}")
+        return pool
+
+
+match_sampler = MatchSampler()
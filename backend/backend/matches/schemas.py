@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
 
 class MatchCreate(BaseModel):
@@ -15,4 +15,27 @@ class MatchResponse(BaseModel):
     submission1: dict
     submission2: dict
     team1_name: str
-    team2_name: str 
\ No newline at end of file
+    team2_name: str
+
+# Matches one /matches/next?count=N request can reserve
+MATCH_PREFETCH_MAX = 50
+
+class MatchBatchResponse(BaseModel):
+    matches: List[MatchResponse]
+
+# Verdicts accepted by one batch submission request
+COMPARISON_BATCH_MAX = 500
+
+class ComparisonVerdict(ComparisonSubmit):
+    comparison_id: int
+
+class ComparisonBatchSubmit(BaseModel):
+    verdicts: List[ComparisonVerdict] = Field(..., min_length=1, max_length=COMPARISON_BATCH_MAX)
+
+class RejectedVerdict(BaseModel):
+    comparison_id: int
+    reason: str
+
+class ComparisonBatchResult(BaseModel):
+    accepted: int
+    rejected: List[RejectedVerdict]
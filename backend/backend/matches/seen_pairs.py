@@ -0,0 +1,89 @@
+import os
+import threading
+import time
+from typing import Dict, Iterable, Set, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+
+from .. import models
+
+# Bounds how long a worker process can miss pairs served to the reviewer by
+# another process; uq_comparisons_reviewer_pair still keeps them from being
+# reserved twice
+SEEN_PAIRS_TTL_SECONDS = float(os.getenv("SEEN_PAIRS_TTL_SECONDS", "300"))
+
+
+# Match ids served to one reviewer in one round. Bounded by how many pairs
+# that reviewer was given, not by the pool size, so a plain set stays small
+# and its C-level lookup keeps sampling scans cheap.
+SeenPairs = Set[int]
+
+
+def served_matches_query(reviewer_id: str, match_round: int):
+    """Matches of the round the reviewer holds or judged a comparison of"""
+    submission1 = aliased(models.Submission)
+    submission2 = aliased(models.Submission)
+    # Comparisons hold submissions; the match is their teams' pair, looked
+    # up through the uq_match_pair_round expression index
+    return select(models.Match.match_id)\
+        .select_from(models.Comparison)\
+        .join(submission1, submission1.submission_id == models.Comparison.submission_1_id)\
+        .join(submission2, submission2.submission_id == models.Comparison.submission_2_id)\
+        .join(
+            models.Match,
+            (models.Match.match_round == models.Comparison.match_round)
+            & (func.least(models.Match.team1_id, models.Match.team2_id)
+               == func.least(submission1.team_id, submission2.team_id))
+            & (func.greatest(models.Match.team1_id, models.Match.team2_id)
+               == func.greatest(submission1.team_id, submission2.team_id))
+        )\
+        .where(
+            models.Comparison.reviewer_id == reviewer_id,
+            models.Comparison.match_round == match_round
+        )
+
+
+class SeenPairsIndex:
+    """
+    Per (reviewer_id, match_round) set of matches already served to the
+    reviewer, so sampling can skip pairs they have judged or hold a lease on.
+
+    Loaded from the reviewer's comparisons on first use and updated by
+    /matches/next as matches are reserved. Only a pre-filter that keeps
+    sampling from drawing served pairs; uq_comparisons_reviewer_pair is
+    what rejects a pair served twice.
+    """
+
+    def __init__(self, ttl_seconds: float = SEEN_PAIRS_TTL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._entries: Dict[Tuple[str, int], Tuple[SeenPairs, float]] = {}
+
+    async def get(self, db: AsyncSession, reviewer_id: str, match_round: int) -> SeenPairs:
+        """Matches of the round served to the reviewer, loading them on a miss"""
+        cached = self._entries.get((reviewer_id, match_round))
+        if cached is not None and time.monotonic() - cached[1] < self.ttl_seconds:
+            return cached[0]
+
+        match_ids = (await db.scalars(served_matches_query(reviewer_id, match_round))).all()
+
+        with self._lock:
+            # Matches marked by this process stay marked across reloads
+            current = self._entries.get((reviewer_id, match_round))
+            seen = current[0] if current is not None else set()
+            seen.update(match_ids)
+            self._entries[(reviewer_id, match_round)] = (seen, time.monotonic())
+        return seen
+
+    def mark(self, reviewer_id: str, match_round: int, match_ids: Iterable[int]) -> None:
+        """Record matches just reserved for the reviewer"""
+        with self._lock:
+            cached = self._entries.get((reviewer_id, match_round))
+            if cached is None:
+                return
+            cached[0].update(match_ids)
+
+
+seen_pairs = SeenPairsIndex()
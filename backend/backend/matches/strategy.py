@@ -0,0 +1,250 @@
+import heapq
+import logging
+import math
+import os
+import random
+import threading
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Container, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .. import models
+
+if TYPE_CHECKING:
+    from .sampler import PooledMatch
+
+logger = logging.getLogger(__name__)
+
+# "random" serves every pair equally often; "information" favours pairs
+# whose outcome is still uncertain
+MATCH_STRATEGY = os.getenv("MATCH_STRATEGY", "random").lower()
+# Random draws before falling back to a scan of the eligible matches
+MAX_SAMPLE_ATTEMPTS = 16
+# Matches are drawn at random from the best count * CANDIDATE_FACTOR, so
+# concurrent reviewers don't all get the single top pair
+CANDIDATE_FACTOR = 4
+INITIAL_ELO = 1200
+
+
+class MatchStrategy(ABC):
+    """
+    Chooses which matches of a round /matches/next serves.
+
+    The sampler owns the pools and tells the strategy when one is loaded or
+    grows; the rating worker reports rating changes.
+    """
+
+    async def pool_loaded(self, db: AsyncSession, match_round: int, matches: List["PooledMatch"]) -> None:
+        pass
+
+    def matches_added(self, match_round: int, matches: Iterable["PooledMatch"]) -> None:
+        pass
+
+    def ratings_changed(self, updates: Iterable[dict]) -> None:
+        pass
+
+    @abstractmethod
+    def choose(
+        self,
+        match_round: int,
+        matches: List["PooledMatch"],
+        reviewer_id: str,
+        count: int,
+        exclude: Container[int] = ()
+    ) -> List["PooledMatch"]:
+        """Up to count distinct matches without the reviewer's team and not in exclude"""
+
+
+def eligible(match: "PooledMatch", reviewer_id: str, exclude: Container[int]) -> bool:
+    return (
+        reviewer_id != match.team1_id
+        and reviewer_id != match.team2_id
+        and match.match_id not in exclude
+    )
+
+
+class RandomStrategy(MatchStrategy):
+    """
+    Uniform random sampling. A draw is an index into the pool, retried while
+    the reviewer is one of the two teams; a team is in 2/N of the pairs, so a
+    retry is rarely needed.
+    """
+
+    def choose(self, match_round, matches, reviewer_id, count, exclude=()):
+        picked: Dict[int, "PooledMatch"] = {}
+        for _ in range(count * MAX_SAMPLE_ATTEMPTS):
+            match = matches[random.randrange(len(matches))]
+            if eligible(match, reviewer_id, exclude):
+                picked[match.match_id] = match
+                if len(picked) == count:
+                    return list(picked.values())
+
+        # Only reached when the reviewer is in or has seen most pairs, or
+        # count is close to the pool size
+        candidates = [match for match in matches if eligible(match, reviewer_id, exclude)]
+        return random.sample(candidates, min(count, len(candidates)))
+
+
+@dataclass
+class TeamRating:
+    score: float = INITIAL_ELO
+    games: int = 0
+
+
+class RoundQueue:
+    """
+    Max-priority queue over one round's matches with lazy updates: a new
+    entry is pushed whenever a priority changes and entries carrying an old
+    version are skipped when popped.
+    """
+
+    def __init__(self):
+        self.heap: List[Tuple[float, int, int]] = []
+        self.versions: Dict[int, int] = {}
+        self.matches: Dict[int, "PooledMatch"] = {}
+        self.by_team: Dict[str, List["PooledMatch"]] = {}
+        # Times each match was served since the pool was loaded
+        self.served: Dict[int, int] = {}
+
+    def add(self, match: "PooledMatch", priority: float) -> None:
+        if match.match_id not in self.matches:
+            self.matches[match.match_id] = match
+            self.by_team.setdefault(match.team1_id, []).append(match)
+            self.by_team.setdefault(match.team2_id, []).append(match)
+        self.push(match, priority)
+
+    def push(self, match: "PooledMatch", priority: float) -> None:
+        version = self.versions.get(match.match_id, 0) + 1
+        self.versions[match.match_id] = version
+        heapq.heappush(self.heap, (-priority, version, match.match_id))
+        if len(self.heap) > 4 * len(self.matches) + 64:
+            self._compact()
+
+    def pop(self) -> Optional[Tuple[float, "PooledMatch"]]:
+        """Highest priority live entry, or None when the queue is empty"""
+        while self.heap:
+            negative_priority, version, match_id = heapq.heappop(self.heap)
+            if self.versions.get(match_id) == version:
+                # Popped entries are pushed back by the caller
+                self.versions[match_id] = version + 1
+                return -negative_priority, self.matches[match_id]
+        return None
+
+    def _compact(self) -> None:
+        self.heap = [
+            entry for entry in self.heap
+            if self.versions.get(entry[2]) == entry[1]
+        ]
+        heapq.heapify(self.heap)
+
+
+class InformationGainStrategy(MatchStrategy):
+    """
+    Serves the pairs whose judgment should move the ratings most.
+
+    A pair's priority is the variance of its outcome under the Elo model,
+    p * (1 - p), which peaks for evenly rated teams, scaled up for teams
+    with few comparisons and down for pairs already served since the pool
+    was loaded. Priorities are kept in a per-round heap and re-pushed for
+    every match of a team whose rating changes.
+    """
+
+    def __init__(self, candidate_factor: int = CANDIDATE_FACTOR):
+        self.candidate_factor = candidate_factor
+        self._lock = threading.Lock()
+        self._ratings: Dict[str, TeamRating] = {}
+        self._queues: Dict[int, RoundQueue] = {}
+
+    def priority(self, match: "PooledMatch", served: int = 0) -> float:
+        rating1 = self._ratings.get(match.team1_id) or TeamRating()
+        rating2 = self._ratings.get(match.team2_id) or TeamRating()
+        expected = 1 / (1 + 10 ** ((rating2.score - rating1.score) / 400))
+        uncertainty = 1 / math.sqrt(1 + rating1.games) + 1 / math.sqrt(1 + rating2.games)
+        return expected * (1 - expected) * uncertainty / (1 + served)
+
+    async def pool_loaded(self, db, match_round, matches):
+        rows = (await db.execute(
+            select(
+                models.Leaderboard.team_id,
+                models.Leaderboard.elo_score,
+                models.Leaderboard.wins,
+                models.Leaderboard.losses
+            )
+        )).all()
+
+        queue = RoundQueue()
+        with self._lock:
+            # Also picks up rating changes applied by other worker processes
+            for team_id, elo_score, wins, losses in rows:
+                self._ratings[team_id] = TeamRating(elo_score, (wins or 0) + (losses or 0))
+            for match in matches:
+                queue.add(match, self.priority(match))
+            self._queues[match_round] = queue
+
+    def matches_added(self, match_round, matches):
+        with self._lock:
+            queue = self._queues.get(match_round)
+            if queue is None:
+                return
+            for match in matches:
+                if match.match_id not in queue.matches:
+                    queue.add(match, self.priority(match))
+
+    def ratings_changed(self, updates):
+        with self._lock:
+            changed = set()
+            for update in updates:
+                self._ratings[update["team_id"]] = TeamRating(
+                    update["score"], update["wins"] + update["losses"]
+                )
+                changed.add(update["team_id"])
+
+            for queue in self._queues.values():
+                for match in {
+                    match for team_id in changed for match in queue.by_team.get(team_id, ())
+                }:
+                    queue.push(match, self.priority(match, queue.served.get(match.match_id, 0)))
+
+    def choose(self, match_round, matches, reviewer_id, count, exclude=()):
+        with self._lock:
+            queue = self._queues.get(match_round)
+            if queue is None:
+                return RandomStrategy().choose(match_round, matches, reviewer_id, count, exclude)
+
+            popped = []
+            candidates = []
+            while len(candidates) < count * self.candidate_factor:
+                entry = queue.pop()
+                if entry is None:
+                    break
+                popped.append(entry)
+                match = entry[1]
+                if eligible(match, reviewer_id, exclude):
+                    candidates.append(match)
+
+            chosen = random.sample(candidates, min(count, len(candidates)))
+            for match in chosen:
+                queue.served[match.match_id] = queue.served.get(match.match_id, 0) + 1
+
+            chosen_ids = {match.match_id for match in chosen}
+            for priority, match in popped:
+                if match.match_id in chosen_ids:
+                    priority = self.priority(match, queue.served[match.match_id])
+                queue.push(match, priority)
+            return chosen
+
+
+STRATEGIES = {
+    "random": RandomStrategy,
+    "information": InformationGainStrategy,
+}
+
+
+def create_strategy(name: str = MATCH_STRATEGY) -> MatchStrategy:
+    if name not in STRATEGIES:
+        logger.error(f"Unknown MATCH_STRATEGY {name!r}, using random")
+        name = "random"
+    return STRATEGIES[name]()
@@ -3,4 +3,5 @@ from .team import Team
 from .leaderboard import Leaderboard
 from .comparison import Comparison
 from .submission import Submission
-from .matches import Match
\ No newline at end of file
+from .matches import Match
+from .competition_state import CompetitionState
\ No newline at end of file
@@ -1,17 +1,5 @@
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
-from sqlalchemy import create_engine
-from dotenv import load_dotenv
-import os
-
-# Load environment variables from .env file
-load_dotenv()
 
+# Engines and sessions live in backend.database; the models only need the
+# declarative base, so importing them never opens a second connection pool.
 Base = declarative_base()
-
-# Get DATABASE_URL from environment variables
-DATABASE_URL = os.getenv('DATABASE_URL')
-engine = create_engine(DATABASE_URL)
-
-# Create a session factory
-SessionLocal = sessionmaker(bind=engine)
\ No newline at end of file
@@ -1,6 +1,6 @@
 from sqlalchemy import (
     Column, Integer, String, DateTime, ForeignKey, 
-    CheckConstraint, text, Float
+    CheckConstraint, Index, text, Float
 )
 from sqlalchemy.sql import func
 from pydantic import BaseModel, Field, confloat
@@ -43,6 +43,11 @@ class Comparison(Base):
     )
     created_at = Column(DateTime, server_default=func.now(), nullable=False)
     completed_at = Column(DateTime, nullable=True)
+    # Set in the same transaction that applies the result to the leaderboard,
+    # so every completed comparison is rated exactly once
+    rated_at = Column(DateTime, nullable=True)
+    # Until when the reviewer holds a pending comparison; expired ones are reclaimed
+    lease_expires_at = Column(DateTime, nullable=True)
 
     # Update constraints
     __table_args__ = (
@@ -64,6 +69,34 @@ class Comparison(Base):
         CheckConstraint(
             '(reviewer_weightage IS NULL) OR (reviewer_weightage >= 0 AND reviewer_weightage <= 1)',
             name='valid_reviewer_weightage'
+        ),
+        # Pending rows are a small, short-lived slice of the table; index only them
+        Index(
+            'idx_comparisons_pending_reviewer',
+            'reviewer_id', 'lease_expires_at',
+            postgresql_where=text("comparison_status = 'pending'")
+        ),
+        Index(
+            'idx_comparisons_pending_lease',
+            'lease_expires_at',
+            postgresql_where=text("comparison_status = 'pending'")
+        ),
+        # A reviewer is served each pair of submissions at most once per round,
+        # in either order; also loads the pairs they were served (seen_pairs)
+        Index(
+            'uq_comparisons_reviewer_pair',
+            reviewer_id,
+            match_round,
+            func.least(submission_1_id, submission_2_id),
+            func.greatest(submission_1_id, submission_2_id),
+            unique=True,
+            postgresql_where=text("reviewer_id IS NOT NULL")
+        ),
+        # Completed comparisons still waiting for a rating update (reconciler)
+        Index(
+            'idx_comparisons_unrated',
+            'completed_at', 'comparison_id',
+            postgresql_where=text("comparison_status = 'completed' AND rated_at IS NULL")
         )
     )
 
@@ -0,0 +1,16 @@
+from sqlalchemy import Column, Integer, DateTime, CheckConstraint
+from sqlalchemy.sql import func
+from backend.models.base import Base
+
+class CompetitionState(Base):
+    __tablename__ = 'competition_state'
+
+    # Single row; the check keeps it that way
+    id = Column(Integer, primary_key=True, default=1)
+    current_round = Column(Integer, nullable=False, default=1)
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
+
+    __table_args__ = (
+        CheckConstraint('id = 1', name='single_row'),
+        CheckConstraint('current_round >= 1', name='valid_current_round'),
+    )
@@ -1,5 +1,5 @@
 # models/match.py
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, CheckConstraint, UniqueConstraint
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, CheckConstraint, UniqueConstraint, Index
 from sqlalchemy.sql import func
 from backend.models.base import Base
 
@@ -15,5 +15,19 @@ class Match(Base):
     __table_args__ = (
         CheckConstraint('team1_id != team2_id', name='different_teams'),
         CheckConstraint('match_round >= 0', name='valid_match_round'),
-        UniqueConstraint('team1_id', 'team2_id', 'match_round', name='unique_match_combination')
+        UniqueConstraint('team1_id', 'team2_id', 'match_round', name='unique_match_combination'),
+        # Order-independent pair key, so (a, b) and (b, a) collide on insert
+        Index(
+            'uq_match_pair_round',
+            func.least(team1_id, team2_id),
+            func.greatest(team1_id, team2_id),
+            match_round,
+            unique=True
+        ),
+        # Loading a round's match pool, answered from the index alone
+        Index(
+            'idx_matches_round_teams',
+            match_round, team1_id, team2_id,
+            postgresql_include=['match_id']
+        )
     )
\ No newline at end of file
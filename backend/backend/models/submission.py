@@ -17,7 +17,7 @@ class SubmissionStatus(str, Enum):
 class Submission(Base):
     __tablename__ = 'submissions'
 
-    submission_id = Column(Integer, primary_key=True, index=True)
+    submission_id = Column(Integer, primary_key=True)
     team_id = Column(String(20), ForeignKey('teams.team_id'), nullable=False)
     prompt = Column(String, nullable=False)
     response = Column(String, nullable=False)
@@ -48,7 +48,20 @@ class Submission(Base):
             name='valid_match_round'
         ),
         # Composite index for quick lookups by team and round
-        Index('idx_team_round', team_id, match_round)
+        Index('idx_team_round', team_id, match_round),
+        # Keyset pagination of the admin listing, unfiltered and per round/status
+        Index('idx_submissions_submitted_at_id', submitted_at, submission_id),
+        Index(
+            'idx_submissions_round_status_submitted_at',
+            match_round, status, submitted_at, submission_id
+        ),
+        # Latest verified submission per team (submission cache) and the
+        # verified teams of a round (match generation). Not partial: asyncpg
+        # binds status as a parameter, which a partial index can't match.
+        Index(
+            'idx_submissions_round_status_team',
+            match_round, status, team_id, submitted_at
+        )
     )
 
 # Pydantic models for request/response validation
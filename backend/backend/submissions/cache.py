@@ -0,0 +1,141 @@
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass, replace
+from datetime import datetime
+from typing import Dict, Iterable, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models.submission import Submission
+from ..models.team import Team
+
+logger = logging.getLogger(__name__)
+
+# Bounds staleness when another worker process verified or unverified a submission
+SUBMISSION_CACHE_TTL_SECONDS = float(os.getenv("SUBMISSION_CACHE_TTL_SECONDS", "60"))
+
+
+def latest_verified_query(team_ids: Iterable[str], match_round: int):
+    """Latest verified submission of each team in the round, with the team name"""
+    return select(
+        Submission.team_id,
+        Submission.submission_id,
+        Submission.prompt,
+        Submission.response,
+        Submission.submitted_at,
+        Team.team_name
+    ).join(
+        Team, Submission.team_id == Team.team_id
+    ).where(
+        Submission.team_id.in_(list(team_ids)),
+        Submission.status == 'verified',
+        Submission.match_round == match_round
+    ).order_by(
+        Submission.team_id,
+        Submission.submitted_at.desc()
+    ).distinct(
+        # Latest verified submission per team
+        Submission.team_id
+    )
+
+
+@dataclass(frozen=True)
+class CachedSubmission:
+    submission_id: int
+    prompt: str
+    response: str
+    team_name: str
+    submitted_at: datetime
+
+
+class VerifiedSubmissionCache:
+    """
+    Latest verified submission per (team_id, match_round), with the team name.
+
+    Filled lazily on lookup and kept current by the verify/unverify endpoints.
+    """
+
+    def __init__(self, ttl_seconds: float = SUBMISSION_CACHE_TTL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._entries: Dict[Tuple[str, int], Tuple[CachedSubmission, float]] = {}
+
+    async def get_many(
+        self,
+        db: AsyncSession,
+        team_ids: Iterable[str],
+        match_round: int
+    ) -> Dict[str, CachedSubmission]:
+        """
+        Latest verified submission for the round of each given team that has
+        one, loading every miss in one query. Teams without one are left out
+        and not cached, so a verification in another process is seen right away.
+        """
+        found: Dict[str, CachedSubmission] = {}
+        missing = []
+        now = time.monotonic()
+        for team_id in set(team_ids):
+            cached = self._entries.get((team_id, match_round))
+            if cached is not None and now - cached[1] < self.ttl_seconds:
+                found[team_id] = cached[0]
+            else:
+                missing.append(team_id)
+        if not missing:
+            return found
+
+        rows = (await db.execute(latest_verified_query(missing, match_round))).all()
+
+        with self._lock:
+            for row in rows:
+                entry = CachedSubmission(
+                    submission_id=row.submission_id,
+                    prompt=row.prompt,
+                    response=row.response,
+                    team_name=row.team_name,
+                    submitted_at=row.submitted_at
+                )
+                self._entries[(row.team_id, match_round)] = (entry, now)
+                found[row.team_id] = entry
+        return found
+
+    def submission_verified(
+        self,
+        team_id: str,
+        match_round: int,
+        submission_id: int,
+        prompt: str,
+        response: str,
+        submitted_at: datetime
+    ) -> None:
+        """Replace the cached entry if the newly verified submission is more recent"""
+        with self._lock:
+            cached = self._entries.get((team_id, match_round))
+            # Without an entry we don't know the team name or whether a newer
+            # verified submission exists; the next lookup loads it
+            if cached is None or cached[0].submitted_at >= submitted_at:
+                return
+            entry = replace(
+                cached[0],
+                submission_id=submission_id,
+                prompt=prompt,
+                response=response,
+                submitted_at=submitted_at
+            )
+            self._entries[(team_id, match_round)] = (entry, time.monotonic())
+
+    def submission_unverified(self, team_id: str, match_round: int, submission_id: int) -> None:
+        """Drop the cached entry if it is the submission that lost its verified status"""
+        with self._lock:
+            cached = self._entries.get((team_id, match_round))
+            if cached is not None and cached[0].submission_id == submission_id:
+                del self._entries[(team_id, match_round)]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+verified_submission_cache = VerifiedSubmissionCache()
@@ -1,11 +1,15 @@
-from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks, Query
+from sqlalchemy import func, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.exc import SQLAlchemyError
-from typing import Optional, List
+from typing import Optional, List, Literal, Tuple
+from datetime import datetime
+import base64
+import json
 from fastapi import status
 
-from ..database import get_db
-from ..models.submission import Submission
+from ..database import get_async_db
+from ..models.submission import Submission, SubmissionStatus
 from ..models.team import Team
 from ..auth import get_current_team_id, require_admin
 from .schemas import (
@@ -13,18 +17,19 @@ from .schemas import (
     SubmissionUpdate, 
     SubmissionResponse, 
     SubmissionDetail,
-    AdminSubmissionDetail
+    AdminSubmissionPage
 )
 from .dependencies import verify_submission_status
-from ..admin.routes import CURRENT_ROUND
-from ..utils.match_generation import generate_matches_for_team
+from ..admin.round import round_cache
+from ..utils.match_generation import generate_matches_in_background
+from .cache import verified_submission_cache
 
 router = APIRouter()
 
 @router.post("/api/submissions", response_model=SubmissionResponse, status_code=201)
 async def create_submission(
     submission: SubmissionCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     team_id: int = Depends(get_current_team_id)
 ):
     """Create a new submission"""
@@ -33,14 +38,13 @@ async def create_submission(
             team_id=team_id,
             prompt=submission.prompt,
             response=submission.response,
-            match_round=CURRENT_ROUND,
+            match_round=await round_cache.get(db),
             status='pending',
             table_metadata=submission.table_metadata
         )
         
         db.add(new_submission)
-        db.commit()
-        db.refresh(new_submission)
+        await db.commit()
         
         return {
             'submission_id': new_submission.submission_id,
@@ -48,7 +52,7 @@ async def create_submission(
         }
         
     except SQLAlchemyError as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=500,
             detail={
@@ -60,15 +64,16 @@ async def create_submission(
 
 @router.get("/api/submissions/mine", response_model=List[SubmissionDetail])
 async def get_my_submissions(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     team_id: int = Depends(get_current_team_id)
 ):
     """Get all submissions for the authenticated team"""
     try:
-        submissions = db.query(Submission)\
-            .filter(Submission.team_id == team_id)\
-            .order_by(Submission.submitted_at.desc())\
-            .all()
+        submissions = (await db.scalars(
+            select(Submission)
+            .where(Submission.team_id == team_id)
+            .order_by(Submission.submitted_at.desc())
+        )).all()
             
         return submissions
         
@@ -87,17 +92,19 @@ async def verify_submission(
     submission_id: int,
     submission_update: SubmissionUpdate,
     background_tasks: BackgroundTasks,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     team_id: int = Depends(get_current_team_id)
 ):
     """Verify or reject a submission"""
     verify_submission_status(submission_update.status)
     
-    submission = db.query(Submission)\
-        .filter(
+    submission = await db.scalar(
+        select(Submission)
+        .where(
             Submission.submission_id == submission_id,
             Submission.team_id == team_id
-        ).first()
+        )
+    )
         
     if not submission:
         raise HTTPException(
@@ -109,28 +116,50 @@ async def verify_submission(
     is_first_verified = False
     if (submission_update.status == 'verified' and 
         submission.status != 'verified'):
-        existing_verified = db.query(Submission)\
-            .filter(
+        existing_verified = await db.scalar(
+            select(Submission.submission_id)
+            .where(
                 Submission.team_id == submission.team_id,
                 Submission.match_round == submission.match_round,
                 Submission.status == 'verified'
-            ).first()
+            )
+            .limit(1)
+        )
         is_first_verified = not existing_verified
     
+    previous_status = submission.status
+    
     # Update submission
     submission.status = submission_update.status
     if submission_update.table_metadata is not None:
         submission.table_metadata = submission_update.table_metadata
     
     try:
-        db.commit()
+        await db.commit()
+        
+        # Keep the match-serving cache in step with the new status
+        if submission_update.status == 'verified' and previous_status != 'verified':
+            verified_submission_cache.submission_verified(
+                submission.team_id,
+                submission.match_round,
+                submission.submission_id,
+                submission.prompt,
+                submission.response,
+                submission.submitted_at
+            )
+        elif submission_update.status != 'verified' and previous_status == 'verified':
+            verified_submission_cache.submission_unverified(
+                submission.team_id,
+                submission.match_round,
+                submission.submission_id
+            )
         
         # If this is team's first verified submission, generate matches
         if is_first_verified:
             background_tasks.add_task(
-                generate_matches_for_team,
-                db,
-                submission.team_id
+                generate_matches_in_background,
+                submission.team_id,
+                submission.match_round
             )
         
         return {
@@ -139,7 +168,7 @@ async def verify_submission(
         }
         
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=str(e)
@@ -148,17 +177,19 @@ async def verify_submission(
 @router.post("/api/submissions/{submission_id}/unverify", response_model=SubmissionResponse)
 async def unverify_submission(
     submission_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     team_id: int = Depends(get_current_team_id)
 ):
     """Unverify a submission if it's not the only verified submission for the round"""
     
     # Get the submission and verify ownership
-    submission = db.query(Submission)\
-        .filter(
+    submission = await db.scalar(
+        select(Submission)
+        .where(
             Submission.submission_id == submission_id,
             Submission.team_id == team_id
-        ).first()
+        )
+    )
         
     if not submission:
         raise HTTPException(
@@ -174,12 +205,15 @@ async def unverify_submission(
         )
     
     # Count verified submissions for this team in this round
-    verified_count = db.query(Submission)\
-        .filter(
+    verified_count = await db.scalar(
+        select(func.count())
+        .select_from(Submission)
+        .where(
             Submission.team_id == team_id,
             Submission.match_round == submission.match_round,
             Submission.status == 'verified'
-        ).count()
+        )
+    )
     
     # Check if this is the only verified submission
     if verified_count <= 1:
@@ -191,7 +225,13 @@ async def unverify_submission(
     try:
         # Update submission status to pending
         submission.status = 'pending'
-        db.commit()
+        await db.commit()
+        
+        verified_submission_cache.submission_unverified(
+            team_id,
+            submission.match_round,
+            submission_id
+        )
         
         return {
             'submission_id': submission.submission_id,
@@ -199,7 +239,7 @@ async def unverify_submission(
         }
         
     except SQLAlchemyError as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail={
@@ -209,38 +249,74 @@ async def unverify_submission(
             }
         )
 
-@router.get("/api/admin/submissions", response_model=List[AdminSubmissionDetail])
+def _encode_cursor(submitted_at: datetime, submission_id: int) -> str:
+    raw = json.dumps([submitted_at.isoformat(), submission_id])
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+def _decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        submitted_at, submission_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return datetime.fromisoformat(submitted_at), int(submission_id)
+    except (ValueError, TypeError):
+        raise HTTPException(
+            status_code=400,
+            detail={
+                'error': 'Invalid cursor',
+                'code': 'INVALID_CURSOR',
+                'details': 'Pass back the next_cursor value from a previous page'
+            }
+        )
+
+@router.get("/api/admin/submissions", response_model=AdminSubmissionPage)
 async def list_submissions(
-    status: Optional[str] = None,
-    team_id: Optional[int] = None,
-    db: Session = Depends(get_db),
+    status: Optional[SubmissionStatus] = None,
+    team_id: Optional[str] = None,
+    match_round: Optional[int] = Query(None, ge=0),
+    view: Literal['full', 'summary'] = 'full',
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=500),
+    db: AsyncSession = Depends(get_async_db),
     _: bool = Depends(require_admin)
 ):
-    """List all submissions (admin only)"""
-    try:
-        query = db.query(Submission, Team)\
-            .join(Team, Submission.team_id == Team.team_id)
-        
-        if status:
-            query = query.filter(Submission.status == status)
-            
-        if team_id:
-            query = query.filter(Submission.team_id == team_id)
-            
-        results = query.order_by(Submission.submitted_at.desc()).all()
-        
-        return [{
-            'submission_id': sub.submission_id,
-            'team_id': sub.team_id,
-            'team_name': team.team_name,
-            'prompt': sub.prompt,
-            'response': sub.response,
-            'status': sub.status,
-            'match_round': sub.match_round,
-            'table_metadata': sub.table_metadata,
-            'submitted_at': sub.submitted_at
-        } for sub, team in results]
+    """
+    List submissions newest first, one page at a time (admin only).
+    Pass next_cursor back as cursor to get the following page; the
+    summary view leaves out prompt, response and metadata.
+    """
+    columns = [
+        Submission.submission_id,
+        Submission.team_id,
+        Team.team_name,
+        Submission.status,
+        Submission.match_round,
+        Submission.submitted_at
+    ]
+    if view == 'full':
+        columns += [Submission.prompt, Submission.response, Submission.table_metadata]
+
+    query = select(*columns).join(Team, Submission.team_id == Team.team_id)
+
+    if status:
+        query = query.where(Submission.status == status.value)
         
+    if team_id:
+        query = query.where(Submission.team_id == team_id)
+
+    if match_round is not None:
+        query = query.where(Submission.match_round == match_round)
+
+    if cursor:
+        # Keyset pagination: resume strictly after the last row of the previous page
+        query = query.where(
+            tuple_(Submission.submitted_at, Submission.submission_id) < _decode_cursor(cursor)
+        )
+
+    query = query\
+        .order_by(Submission.submitted_at.desc(), Submission.submission_id.desc())\
+        .limit(limit + 1)
+
+    try:
+        rows = (await db.execute(query)).mappings().all()
     except SQLAlchemyError as e:
         raise HTTPException(
             status_code=500,
@@ -251,20 +327,34 @@ async def list_submissions(
             }
         )
 
+    items = [dict(row) for row in rows[:limit]]
+    next_cursor = None
+    if len(rows) > limit:
+        last = items[-1]
+        next_cursor = _encode_cursor(last['submitted_at'], last['submission_id'])
+
+    return {
+        'items': items,
+        'next_cursor': next_cursor,
+        'size': len(items)
+    }
+
 @router.get("/api/submissions/latest-verified", response_model=Optional[SubmissionResponse])
 async def get_latest_verified_submission(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     team_id: int = Depends(get_current_team_id)
 ):
     """Get the latest verified submission for the team"""
     try:
-        latest = db.query(Submission)\
-            .filter(
+        latest = await db.scalar(
+            select(Submission)
+            .where(
                 Submission.team_id == team_id,
                 Submission.status == 'verified'
-            )\
-            .order_by(Submission.submitted_at.desc())\
-            .first()
+            )
+            .order_by(Submission.submitted_at.desc())
+            .limit(1)
+        )
             
         if not latest:
             return None
@@ -1,6 +1,6 @@
 from pydantic import BaseModel, Field
 from datetime import datetime
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional, Union
 from ..models.submission import SubmissionStatus
 
 class SubmissionCreate(BaseModel):
@@ -30,4 +30,17 @@ class SubmissionDetail(BaseModel):
 
 class AdminSubmissionDetail(SubmissionDetail):
     team_id: str
-    team_name: str 
\ No newline at end of file
+    team_name: str
+
+class AdminSubmissionSummary(BaseModel):
+    submission_id: int
+    team_id: str
+    team_name: str
+    status: str
+    match_round: int
+    submitted_at: datetime
+
+class AdminSubmissionPage(BaseModel):
+    items: List[Union[AdminSubmissionDetail, AdminSubmissionSummary]]
+    next_cursor: Optional[str] = None
+    size: int
@@ -1,16 +1,115 @@
-import asyncio
-from datetime import datetime
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
 import logging
+import os
+from typing import List
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import func, literal_column, select
+from sqlalchemy.orm import Session
+
+from .. import models
+from ..admin.round import load_current_round
+from ..database import engine
+from ..matches.leases import expire_leases
+from ..matches.rating_worker import RatingResult, rating_worker
+from ..utils.match_generation import generate_round_matches
 
 logger = logging.getLogger(__name__)
 
+RECONCILE_INTERVAL_SECONDS = int(os.getenv("RECONCILE_INTERVAL_SECONDS", "60"))
+# Upper bound on rows each step touches per run
+RECONCILE_BATCH_SIZE = int(os.getenv("RECONCILE_BATCH_SIZE", "1000"))
+# Completed but unrated comparisons younger than this are probably still
+# queued in some process' rating worker
+UNRATED_GRACE_SECONDS = 60
+
+# Session-level advisory lock so one process runs the reconciler at a time
+RECONCILE_LOCK_KEY = 0x5245434F  # "RECO"
+
+
+@dataclass
+class ReconcileResult:
+    expired_comparisons: int = 0
+    matches_created: int = 0
+    unrated: List[RatingResult] = field(default_factory=list)
+
+
+def unrated_comparisons_query(completed_before: datetime, limit: int):
+    """Served by idx_comparisons_unrated"""
+    return select(
+        models.Comparison.comparison_id,
+        models.Comparison.winner_team_id,
+        models.Comparison.loser_team_id
+    ).where(
+        # Inlined so it matches the partial index predicate
+        models.Comparison.comparison_status == literal_column("'completed'"),
+        models.Comparison.rated_at.is_(None),
+        models.Comparison.completed_at < completed_before
+    ).order_by(
+        models.Comparison.completed_at,
+        models.Comparison.comparison_id
+    ).limit(limit)
+
+
+def find_unrated_comparisons(db: Session, completed_before: datetime, limit: int) -> List[RatingResult]:
+    """Completed comparisons whose rating update was lost, oldest first"""
+    rows = db.execute(unrated_comparisons_query(completed_before, limit)).all()
+    db.rollback()
+    return [RatingResult(*row) for row in rows]
+
+
+def reconcile_matches() -> ReconcileResult:
+    """
+    One bounded reconciliation pass:
+    expire abandoned pending comparisons, backfill missing matches for the
+    current round, and collect completed comparisons that were never rated
+    for the caller to enqueue.
+    Skipped if another process is already reconciling.
+    """
+    result = ReconcileResult()
+    with engine.connect() as conn:
+        acquired = conn.scalar(select(func.pg_try_advisory_lock(RECONCILE_LOCK_KEY)))
+        conn.commit()
+        if not acquired:
+            logger.info("Reconciler already running in another process, skipping")
+            return result
+
+        # Bound to this connection so the session-level lock stays ours
+        db = Session(bind=conn)
+        try:
+            now = datetime.utcnow()
+            # Pending comparisons whose reviewer let the lease run out
+            result.expired_comparisons = expire_leases(db, now, RECONCILE_BATCH_SIZE)
+            # Picks up teams whose generate_matches_for_team background task failed
+            result.matches_created = generate_round_matches(
+                db, load_current_round(db), limit=RECONCILE_BATCH_SIZE
+            )
+            result.unrated = find_unrated_comparisons(
+                db, now - timedelta(seconds=UNRATED_GRACE_SECONDS), RECONCILE_BATCH_SIZE
+            )
+        finally:
+            db.close()
+            conn.scalar(select(func.pg_advisory_unlock(RECONCILE_LOCK_KEY)))
+            conn.commit()
+
+    return result
+
+
 async def process_matches():
-    """Async task to process matches."""
+    """Scheduled reconciler for matches, pending comparisons and lost rating updates."""
     try:
         logger.info(f"Running match processing task at {datetime.utcnow()}")
-        await asyncio.sleep(1)  # Simulate some async work
-        # TODO: Implement match processing logic
-        logger.info("Match processing task completed")
+        result = await run_in_threadpool(reconcile_matches)
+        # Enqueued from the event loop in one go, so the worker applies them
+        # together; any that were rated meanwhile are skipped there
+        rating_worker.enqueue_many(result.unrated)
+        logger.info(
+            "Match processing task completed: "
+            f"{result.expired_comparisons} pending comparisons expired, "
+            f"{result.matches_created} matches created, "
+            f"{len(result.unrated)} unrated comparisons re-queued"
+        )
     except Exception as e:
         logger.error(f"Error in match processing task: {e}")
-        raise 
\ No newline at end of file
+        raise
@@ -0,0 +1,81 @@
+import threading
+import time
+from typing import Any, Dict
+
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+
+class PoolStats:
+    """Checkout counters for one connection pool"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.waits = 0
+        self.timeouts = 0
+        self.overflow_checkouts = 0
+        self.checkout_seconds_total = 0.0
+        self.checkout_seconds_max = 0.0
+
+    def record_checkout(self, seconds: float, waited: bool, overflowed: bool) -> None:
+        with self._lock:
+            self.checkouts += 1
+            self.waits += waited
+            self.overflow_checkouts += overflowed
+            self.checkout_seconds_total += seconds
+            self.checkout_seconds_max = max(self.checkout_seconds_max, seconds)
+
+    def record_timeout(self) -> None:
+        with self._lock:
+            self.timeouts += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "checkouts": self.checkouts,
+                "waits": self.waits,
+                "timeouts": self.timeouts,
+                "overflow_checkouts": self.overflow_checkouts,
+                "checkout_seconds_total": round(self.checkout_seconds_total, 6),
+                "checkout_seconds_avg": round(self.checkout_seconds_total / self.checkouts, 6) if self.checkouts else 0.0,
+                "checkout_seconds_max": round(self.checkout_seconds_max, 6)
+            }
+
+
+class _InstrumentedPoolMixin:
+    stats: PoolStats
+
+    def connect(self):
+        started = time.perf_counter()
+        # Nothing idle and no overflow left: this checkout has to wait
+        waited = self.checkedin() == 0 and -1 < self._max_overflow <= self.overflow()
+        try:
+            connection = super().connect()
+        except exc.TimeoutError:
+            self.stats.record_timeout()
+            raise
+        self.stats.record_checkout(
+            time.perf_counter() - started,
+            waited,
+            self.overflow() > 0
+        )
+        return connection
+
+    def pool_status(self) -> Dict[str, Any]:
+        return {
+            "size": self.size(),
+            "max_overflow": self._max_overflow,
+            "checked_in": self.checkedin(),
+            "checked_out": self.checkedout(),
+            "overflow": max(0, self.overflow()),
+            **self.stats.snapshot()
+        }
+
+
+class InstrumentedQueuePool(_InstrumentedPoolMixin, QueuePool):
+    stats = PoolStats()
+
+
+class InstrumentedAsyncQueuePool(_InstrumentedPoolMixin, AsyncAdaptedQueuePool):
+    stats = PoolStats()
@@ -0,0 +1,196 @@
+import argparse
+import logging
+import time
+from array import array
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Tuple
+
+import numpy as np
+from sqlalchemy import func, select, update
+from sqlalchemy.orm import Session
+
+from .. import models
+from ..matches.rating_worker import RATINGS_LOCK_KEY
+
+logger = logging.getLogger(__name__)
+
+INITIAL_ELO = 1200
+REPLAY_YIELD_PER = 10_000
+
+
+@dataclass
+class ReplayResult:
+    comparisons_replayed: int
+    comparisons_skipped: int
+    teams_updated: int
+    elapsed_seconds: float
+    dry_run: bool
+
+
+def schedule_waves(winners: np.ndarray, losers: np.ndarray, n_teams: int) -> np.ndarray:
+    """
+    Assign each comparison to the earliest wave after every earlier
+    comparison involving either of its teams.
+
+    Comparisons within a wave touch disjoint teams, so a wave can be applied
+    as one vectorized step while giving exactly the sequential result.
+    """
+    last_wave = [0] * n_teams
+    waves = np.empty(len(winners), dtype=np.int64)
+    for i, (w, l) in enumerate(zip(winners.tolist(), losers.tolist())):
+        wave = max(last_wave[w], last_wave[l]) + 1
+        waves[i] = wave
+        last_wave[w] = wave
+        last_wave[l] = wave
+    return waves
+
+
+def replay_elo(
+    winners: np.ndarray,
+    losers: np.ndarray,
+    n_teams: int,
+    k_factor: float = 32,
+    initial_rating: float = INITIAL_ELO
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Recompute Elo ratings from an ordered history of results.
+
+    Args:
+        winners: Team index of the winner of each comparison, in order
+        losers: Team index of the loser of each comparison, in order
+        n_teams: Number of teams (size of the rating arrays)
+        k_factor: Same meaning as in calculate_elo_change
+        initial_rating: Rating every team starts from
+
+    Returns:
+        Tuple containing (ratings, wins, losses), each indexed by team
+    """
+    ratings = np.full(n_teams, float(initial_rating))
+    wins = np.bincount(winners, minlength=n_teams)
+    losses = np.bincount(losers, minlength=n_teams)
+    if len(winners) == 0:
+        return ratings, wins, losses
+
+    waves = schedule_waves(winners, losers, n_teams)
+    order = np.argsort(waves, kind="stable")
+    bounds = np.flatnonzero(np.diff(waves[order])) + 1
+
+    for idx in np.split(order, bounds):
+        w = winners[idx]
+        l = losers[idx]
+        expected_winner = 1 / (1 + np.power(10.0, (ratings[l] - ratings[w]) / 400))
+        change = k_factor * (1 - expected_winner)
+        # Mirror the live path: calculate_elo_change rounds to 2 decimals and
+        # the integer elo_score column rounds again on write
+        ratings[w] = np.rint(np.round(ratings[w] + change, 2))
+        ratings[l] = np.rint(np.round(ratings[l] - change, 2))
+
+    return ratings, wins, losses
+
+
+def replay_leaderboard(
+    db: Session,
+    k_factor: float = 32,
+    initial_rating: int = INITIAL_ELO,
+    dry_run: bool = False
+) -> ReplayResult:
+    """
+    Rebuild every team's Elo, wins and losses from the completed comparisons.
+
+    Runs under the ratings advisory lock, so the rating worker waits until the
+    rebuilt leaderboard is committed. Every completed comparison is marked as
+    rated first, so the worker never applies one on top of the replay.
+    """
+    started = time.perf_counter()
+
+    db.execute(select(func.pg_advisory_xact_lock(RATINGS_LOCK_KEY)))
+    current_time = datetime.utcnow()
+    db.execute(
+        update(models.Comparison)
+        .where(
+            models.Comparison.comparison_status == 'completed',
+            models.Comparison.rated_at.is_(None)
+        )
+        .values(rated_at=current_time)
+    )
+
+    team_ids = list(db.execute(select(models.Leaderboard.team_id)).scalars())
+    team_index = {team_id: i for i, team_id in enumerate(team_ids)}
+
+    winners = array('q')
+    losers = array('q')
+    skipped = 0
+    history = db.execute(
+        select(models.Comparison.winner_team_id, models.Comparison.loser_team_id)
+        .where(models.Comparison.comparison_status == 'completed')
+        .order_by(models.Comparison.completed_at, models.Comparison.comparison_id)
+        .execution_options(yield_per=REPLAY_YIELD_PER)
+    )
+    for winner_team_id, loser_team_id in history:
+        w = team_index.get(winner_team_id)
+        l = team_index.get(loser_team_id)
+        if w is None or l is None:
+            skipped += 1
+            continue
+        winners.append(w)
+        losers.append(l)
+
+    ratings, wins, losses = replay_elo(
+        np.frombuffer(winners, dtype=np.int64) if winners else np.empty(0, dtype=np.int64),
+        np.frombuffer(losers, dtype=np.int64) if losers else np.empty(0, dtype=np.int64),
+        len(team_ids),
+        k_factor=k_factor,
+        initial_rating=initial_rating
+    )
+
+    if dry_run:
+        db.rollback()
+    else:
+        # ORM bulk UPDATE by primary key: one executemany, no object loading
+        db.execute(update(models.Leaderboard), [
+            {
+                "team_id": team_id,
+                "elo_score": int(ratings[i]),
+                "wins": int(wins[i]),
+                "losses": int(losses[i]),
+                "last_updated": current_time
+            } for i, team_id in enumerate(team_ids)
+        ])
+        db.commit()
+
+    result = ReplayResult(
+        comparisons_replayed=len(winners),
+        comparisons_skipped=skipped,
+        teams_updated=0 if dry_run else len(team_ids),
+        elapsed_seconds=round(time.perf_counter() - started, 3),
+        dry_run=dry_run
+    )
+    logger.info(f"Elo replay finished: {result}")
+    return result
+
+
+def main():
+    from ..database import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Rebuild the leaderboard from comparison history")
+    parser.add_argument("--k-factor", type=float, default=32)
+    parser.add_argument("--initial-rating", type=int, default=INITIAL_ELO)
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        result = replay_leaderboard(
+            db,
+            k_factor=args.k_factor,
+            initial_rating=args.initial_rating,
+            dry_run=args.dry_run
+        )
+        print(result)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+import csv
+import io
+import json
+import zlib
+from typing import Any, AsyncIterator, Dict, List, Sequence
+
+from sqlalchemy import Select
+
+from ..database import AsyncSessionLocal
+
+# Rows fetched per round-trip from the server-side cursor
+EXPORT_YIELD_PER = 1000
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+
+def _json_default(value: Any) -> str:
+    # datetimes and anything else json can't encode natively
+    return value.isoformat() if hasattr(value, "isoformat") else str(value)
+
+
+def _encode_ndjson(rows: Sequence[Dict[str, Any]]) -> bytes:
+    return "".join(
+        json.dumps(dict(row), default=_json_default) + "\n" for row in rows
+    ).encode()
+
+
+def _csv_value(value: Any) -> Any:
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, default=_json_default)
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    return value
+
+
+def _encode_csv(rows: Sequence[Dict[str, Any]], columns: List[str]) -> bytes:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow([_csv_value(row[column]) for column in columns])
+    return buffer.getvalue().encode()
+
+
+async def stream_export(query: Select, fmt: str, compress: bool = False) -> AsyncIterator[bytes]:
+    """
+    Stream the rows of a query as NDJSON or CSV, optionally gzipped.
+
+    Rows come from a server-side cursor one partition at a time, so memory
+    stays flat regardless of table size. The session is owned by the
+    generator because it outlives the request's dependencies.
+    """
+    compressor = zlib.compressobj(wbits=31) if compress else None
+    columns = [c.key for c in query.selected_columns]
+
+    def emit(chunk: bytes) -> bytes:
+        return compressor.compress(chunk) if compressor else chunk
+
+    if fmt == "csv":
+        buffer = io.StringIO()
+        csv.writer(buffer).writerow(columns)
+        yield emit(buffer.getvalue().encode())
+
+    async with AsyncSessionLocal() as db:
+        result = await db.stream(query.execution_options(yield_per=EXPORT_YIELD_PER))
+        async for partition in result.mappings().partitions():
+            chunk = _encode_csv(partition, columns) if fmt == "csv" else _encode_ndjson(partition)
+            data = emit(chunk)
+            if data:
+                yield data
+
+    if compressor:
+        yield compressor.flush()
@@ -1,49 +1,65 @@
+from typing import Iterable, List, Optional
+from sqlalchemy import exists, func, literal, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from datetime import datetime
 from .. import models
+from ..leaderboard.cache import leaderboard_cache
 import logging
 
 logger = logging.getLogger(__name__)
 
+INITIAL_ELO = 1200
+
+def _insert_missing_teams(team_ids: Optional[Iterable[str]] = None):
+    """
+    INSERT ... SELECT a default leaderboard row for every team that has none,
+    optionally limited to the given teams. Concurrent syncs don't conflict.
+    """
+    missing = select(
+        models.Team.team_id,
+        literal(INITIAL_ELO),
+        literal(0),
+        literal(0),
+        literal(0),
+        func.now()
+    ).where(
+        ~exists().where(models.Leaderboard.team_id == models.Team.team_id)
+    )
+    if team_ids is not None:
+        missing = missing.where(models.Team.team_id.in_(list(team_ids)))
+
+    return insert(models.Leaderboard)\
+        .from_select(
+            ['team_id', 'elo_score', 'comparisons_made', 'wins', 'losses', 'last_updated'],
+            missing
+        )\
+        .on_conflict_do_nothing()\
+        .returning(models.Leaderboard.team_id)
+
 def sync_teams_to_leaderboard(db: Session) -> None:
     """
     Syncs teams table with leaderboard table.
     Adds missing teams to leaderboard with default values.
     """
     try:
-        # Get all team IDs
-        team_ids = {team.team_id for team in db.query(models.Team).all()}
-        
-        # Get existing leaderboard team IDs
-        leaderboard_team_ids = {
-            record.team_id 
-            for record in db.query(models.Leaderboard).all()
-        }
-        
-        # Find teams missing from leaderboard
-        missing_team_ids = team_ids - leaderboard_team_ids
-        
-        # Add missing teams to leaderboard
-        for team_id in missing_team_ids:
-            new_record = models.Leaderboard(
-                team_id=team_id,
-                elo_score=1200,
-                comparisons_made=0,
-                wins=0,
-                losses=0,
-                last_updated=datetime.utcnow()
-            )
-            db.add(new_record)
-            logger.info(f"Adding team {team_id} to leaderboard with default values")
-        
+        added = db.execute(_insert_missing_teams()).scalars().all()
         db.commit()
-        
-        if missing_team_ids:
-            logger.info(f"Added {len(missing_team_ids)} teams to leaderboard")
+
+        if added:
+            leaderboard_cache.invalidate()
+            logger.info(f"Added {len(added)} teams to leaderboard")
         else:
             logger.info("No new teams needed to be added to leaderboard")
-            
+
     except Exception as e:
         db.rollback()
         logger.error(f"Error syncing teams to leaderboard: {str(e)}")
-        raise 
\ No newline at end of file
+        raise
+
+async def add_teams_to_leaderboard(db: AsyncSession, team_ids: Iterable[str]) -> List[str]:
+    """
+    Add leaderboard rows for the given teams if they have none, in the
+    caller's transaction. The caller commits and then invalidates the cache.
+    """
+    return (await db.execute(_insert_missing_teams(team_ids))).scalars().all()
@@ -1,59 +1,106 @@
-import itertools
 import logging
+from typing import Optional
+from sqlalchemy import String, func, literal, select
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.orm import Session
 from .. import models
-from ..admin.routes import CURRENT_ROUND
+from ..database import SessionLocal
+from ..matches.sampler import match_sampler, PooledMatch
 
 logger = logging.getLogger(__name__)
 
-def generate_matches_for_team(db: Session, team_id: str) -> int:
+MATCH_COLUMNS = ['team1_id', 'team2_id', 'match_round']
+
+def _verified_teams(match_round: int):
+    return select(models.Submission.team_id)\
+        .where(
+            models.Submission.match_round == match_round,
+            models.Submission.status == 'verified'
+        )\
+        .distinct()
+
+def _insert_matches(db: Session, pairs, match_round: int) -> int:
+    """
+    INSERT ... SELECT the given pairs, skipping any that already exist in
+    either direction (uq_match_pair_round), and add them to the match pool
+    """
+    stmt = insert(models.Match)\
+        .from_select(MATCH_COLUMNS, pairs)\
+        .on_conflict_do_nothing()\
+        .returning(models.Match.match_id, models.Match.team1_id, models.Match.team2_id)
+
+    created = [PooledMatch(*row) for row in db.execute(stmt)]
+    db.commit()
+
+    match_sampler.add(match_round, created)
+    return len(created)
+
+def generate_matches_for_team(db: Session, team_id: str, match_round: int) -> int:
     """
     Generate matches for a team against other teams with verified submissions
     Returns number of new matches created
     """
     try:
-        # Get all other teams with verified submissions in current round
-        other_teams = db.query(models.Team.team_id)\
-            .join(models.Submission, models.Team.team_id == models.Submission.team_id)\
-            .filter(
-                models.Submission.match_round == CURRENT_ROUND,
-                models.Submission.status == 'verified',
-                models.Team.team_id != team_id
-            )\
-            .distinct()\
-            .all()
-        
-        other_team_ids = [team[0] for team in other_teams]
-        matches_created = 0
-        
-        # Create matches with each other team
-        for other_team_id in other_team_ids:
-            # Check if match already exists in either direction
-            existing_match = db.query(models.Match)\
-                .filter(
-                    models.Match.match_round == CURRENT_ROUND,
-                    ((models.Match.team1_id == team_id) & (models.Match.team2_id == other_team_id)) |
-                    ((models.Match.team1_id == other_team_id) & (models.Match.team2_id == team_id))
-                ).first()
-            
-            if existing_match:
-                continue
-                
-            match = models.Match(
-                team1_id=team_id,
-                team2_id=other_team_id,
-                match_round=CURRENT_ROUND
-            )
-            db.add(match)
-            matches_created += 1
-        
+        other_teams = _verified_teams(match_round)\
+            .where(models.Submission.team_id != team_id)\
+            .subquery()
+
+        pairs = select(
+            literal(team_id, String),
+            other_teams.c.team_id,
+            literal(match_round)
+        )
+
+        matches_created = _insert_matches(db, pairs, match_round)
         if matches_created > 0:
-            db.commit()
             logger.info(f"Created {matches_created} new matches for team {team_id}")
-        
+
         return matches_created
-        
+
     except Exception as e:
         db.rollback()
         logger.error(f"Error generating matches for team {team_id}: {str(e)}")
-        return 0 
\ No newline at end of file
+        return 0
+
+def generate_round_matches(db: Session, match_round: int, limit: Optional[int] = None) -> int:
+    """
+    Generate every missing pair between teams with verified submissions in a round,
+    or at most limit of them
+    Returns number of new matches created
+    """
+    verified = _verified_teams(match_round).cte('verified_teams')
+    team1 = verified.alias('team1')
+    team2 = verified.alias('team2')
+
+    pairs = select(
+        team1.c.team_id,
+        team2.c.team_id,
+        literal(match_round)
+    ).where(team1.c.team_id < team2.c.team_id)
+    if limit is not None:
+        # Existing pairs (stored in either order) are skipped before the
+        # limit applies, so repeated limited runs make progress. Matches
+        # uq_match_pair_round's expressions, so the lookup uses that index.
+        existing = select(models.Match.match_id).where(
+            func.least(models.Match.team1_id, models.Match.team2_id) == team1.c.team_id,
+            func.greatest(models.Match.team1_id, models.Match.team2_id) == team2.c.team_id,
+            models.Match.match_round == match_round
+        )
+        pairs = pairs.where(~existing.exists()).limit(limit)
+
+    try:
+        matches_created = _insert_matches(db, pairs, match_round)
+    except Exception:
+        db.rollback()
+        raise
+
+    logger.info(f"Created {matches_created} new matches for round {match_round}")
+    return matches_created
+
+def generate_matches_in_background(team_id: str, match_round: int) -> int:
+    """Background task entry point; uses its own session instead of the request's"""
+    db = SessionLocal()
+    try:
+        return generate_matches_for_team(db, team_id, match_round)
+    finally:
+        db.close()
@@ -0,0 +1,234 @@
+import hashlib
+import logging
+import os
+import re
+import threading
+import time
+from collections import Counter
+from contextvars import ContextVar
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STATEMENT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 250)
+
+# The same statement executed this many times in one request is reported
+# as a likely N+1 query pattern
+N_PLUS_ONE_THRESHOLD = int(os.getenv("N_PLUS_ONE_THRESHOLD", "10"))
+
+_IN_LIST = re.compile(r"\bIN \([^()]*\)", re.IGNORECASE)
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_statement(statement: str) -> str:
+    """Parameterized SQL with expanded IN lists collapsed, so repeats compare equal"""
+    return _WHITESPACE.sub(" ", _IN_LIST.sub("IN (...)", statement)).strip()
+
+
+class Histogram:
+    def __init__(self, buckets: Iterable[float]):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * len(self.buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.count += 1
+        self.sum += value
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+
+
+class RequestStats:
+    """Database work done on behalf of one request, including its background tasks"""
+
+    def __init__(self):
+        self.statements = 0
+        self.db_seconds = 0.0
+        self.by_statement: Counter = Counter()
+
+    def record(self, statement: str, seconds: float) -> None:
+        self.statements += 1
+        self.db_seconds += seconds
+        self.by_statement[normalize_statement(statement)] += 1
+
+
+_request_stats: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latency: Dict[Tuple[str, str], Histogram] = {}
+        self.db_time: Dict[Tuple[str, str], Histogram] = {}
+        self.statements: Dict[Tuple[str, str], Histogram] = {}
+        self.responses: Counter = Counter()
+        self.n_plus_one: Counter = Counter()
+        self._reported: Set[Tuple[str, str]] = set()
+        # Statements run outside any request (rating worker, scheduler, startup)
+        self.background_statements = 0
+        self.background_db_seconds = 0.0
+
+    def record_background(self, seconds: float) -> None:
+        with self._lock:
+            self.background_statements += 1
+            self.background_db_seconds += seconds
+
+    def record_request(
+        self,
+        method: str,
+        route: str,
+        status_code: int,
+        seconds: float,
+        stats: RequestStats
+    ) -> None:
+        key = (method, route)
+        with self._lock:
+            if key not in self.latency:
+                self.latency[key] = Histogram(LATENCY_BUCKETS)
+                self.db_time[key] = Histogram(LATENCY_BUCKETS)
+                self.statements[key] = Histogram(STATEMENT_BUCKETS)
+            self.latency[key].observe(seconds)
+            self.db_time[key].observe(stats.db_seconds)
+            self.statements[key].observe(stats.statements)
+            self.responses[(method, route, str(status_code))] += 1
+
+            for statement, executions in stats.by_statement.items():
+                if executions < N_PLUS_ONE_THRESHOLD:
+                    continue
+                fingerprint = hashlib.md5(statement.encode()).hexdigest()[:12]
+                self.n_plus_one[(route, fingerprint)] += 1
+                if (route, fingerprint) not in self._reported:
+                    self._reported.add((route, fingerprint))
+                    logger.warning(
+                        f"Possible N+1 query in {method} {route}: statement {fingerprint} "
+                        f"ran {executions} times in one request: {statement[:500]}"
+                    )
+
+    def render(self, extra: Optional[Dict[str, Dict[str, Dict[str, Any]]]] = None) -> str:
+        """
+        Prometheus text exposition. extra maps a metric prefix to labelled
+        stats dicts, e.g. {"db_pool": pool_status()}; the inner keys become a
+        `kind` label.
+        """
+        lines: List[str] = []
+        with self._lock:
+            _render_histograms(lines, "http_request_duration_seconds", "Request latency", self.latency)
+            _render_histograms(lines, "http_request_db_seconds", "Time spent in SQL per request", self.db_time)
+            _render_histograms(lines, "http_request_db_statements", "SQL statements per request", self.statements)
+
+            lines.append("# HELP http_requests_total Responses by route and status")
+            lines.append("# TYPE http_requests_total counter")
+            for (method, route, status_code), count in sorted(self.responses.items()):
+                lines.append(f"http_requests_total{_labels(method=method, route=route, status=status_code)} {count}")
+
+            lines.append("# HELP http_n_plus_one_total Requests that repeated one statement at least N_PLUS_ONE_THRESHOLD times")
+            lines.append("# TYPE http_n_plus_one_total counter")
+            for (route, fingerprint), count in sorted(self.n_plus_one.items()):
+                lines.append(f"http_n_plus_one_total{_labels(route=route, statement=fingerprint)} {count}")
+
+            lines.append("# TYPE db_background_statements_total counter")
+            lines.append(f"db_background_statements_total {self.background_statements}")
+            lines.append("# TYPE db_background_seconds_total counter")
+            lines.append(f"db_background_seconds_total {self.background_db_seconds:.6f}")
+
+        for prefix, groups in (extra or {}).items():
+            for name in sorted({key for stats in groups.values() for key in stats}):
+                lines.append(f"# TYPE {prefix}_{name} untyped")
+                for label, stats in groups.items():
+                    value = stats.get(name)
+                    if isinstance(value, (int, float)):
+                        labels = _labels(kind=label) if label else ""
+                        lines.append(f"{prefix}_{name}{labels} {value}")
+
+        return "\n".join(lines) + "\n"
+
+
+def _labels(**labels: str) -> str:
+    escaped = (
+        f'{key}="' + str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") + '"'
+        for key, value in labels.items()
+    )
+    return "{" + ",".join(escaped) + "}"
+
+
+def _render_histograms(lines: List[str], name: str, help_text: str, histograms: Dict[Tuple[str, str], Histogram]) -> None:
+    lines.append(f"# HELP {name} {help_text}")
+    lines.append(f"# TYPE {name} histogram")
+    for (method, route), histogram in sorted(histograms.items()):
+        # observe() already keeps bucket counts cumulative
+        for bound, count in zip(histogram.buckets, histogram.counts):
+            lines.append(f"{name}_bucket{_labels(method=method, route=route, le=f'{bound:g}')} {count}")
+        lines.append(f"{name}_bucket{_labels(method=method, route=route, le='+Inf')} {histogram.count}")
+        lines.append(f"{name}_sum{_labels(method=method, route=route)} {histogram.sum:.6f}")
+        lines.append(f"{name}_count{_labels(method=method, route=route)} {histogram.count}")
+
+
+metrics = MetricsRegistry()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    # Kept on the execution context, so failed statements leave nothing behind
+    context._metrics_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    seconds = time.perf_counter() - context._metrics_started
+    stats = _request_stats.get()
+    if stats is not None:
+        stats.record(statement, seconds)
+    else:
+        metrics.record_background(seconds)
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Time every statement; pass async_engine.sync_engine for the async engine"""
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware recording latency until the response is sent, and
+    SQL counts and time for everything run on the request's behalf.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = _request_stats.set(stats)
+        started = time.perf_counter()
+        finished: List[float] = []
+        status_code = [500]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status_code[0] = message["status"]
+            elif message["type"] == "http.response.body" and not message.get("more_body", False):
+                finished.append(time.perf_counter())
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _request_stats.reset(token)
+            # Set by the router on a match; templated, so label cardinality stays bounded
+            route = scope.get("route")
+            metrics.record_request(
+                scope["method"],
+                getattr(route, "path", "unmatched"),
+                status_code[0],
+                (finished[0] if finished else time.perf_counter()) - started,
+                stats
+            )
@@ -55,4 +55,10 @@ class TaskScheduler:
             return job_id
         except Exception as e:
             logger.error(f"Failed to schedule interval task: {e}")
-            raise 
\ No newline at end of file
+            raise
+
+    def shutdown(self):
+        """Stop the scheduler without waiting for running jobs."""
+        if self.scheduler.running:
+            self.scheduler.shutdown(wait=False)
+            logger.info("Scheduler stopped")